@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Event, Consensus
-from app.services.consensus_calculator import calculate_consensus
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import Event, Consensus, LatestForecast, Source
+from app.services.consensus_calculator import calculate_consensus, calculate_consensus_batch, query_latest_forecasts
+from app.services.cache import response_cache
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+import os
 
 router = APIRouter()
 
+# Most events one bulk consensus request may ask for
+CONSENSUS_BATCH_MAX = int(os.getenv("CONSENSUS_BATCH_MAX", "500"))
+
 class ConsensusResponse(BaseModel):
     event_id: int
     event_title: str
@@ -20,15 +26,96 @@ class ConsensusResponse(BaseModel):
     source_count: int
     timestamp: datetime
 
+class ConsensusSummary(BaseModel):
+    event_id: int
+    probability: float
+    disagreement: float
+    disagreement_label: str
+    confidence_interval_lower: float
+    confidence_interval_upper: float
+    source_count: int
+    timestamp: Optional[datetime]
+
+class ConsensusBatchRequest(BaseModel):
+    event_ids: List[int] = Field(..., max_length=CONSENSUS_BATCH_MAX)
+
+@router.get("/", response_model=List[ConsensusSummary])
+async def list_consensus(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated event IDs"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Current consensus for many events in one request, in the order asked for.
+    Events without a consensus or any forecasts are left out.
+    """
+    try:
+        event_ids = [int(event_id) for event_id in ids.split(",") if event_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(event_ids) > CONSENSUS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {CONSENSUS_BATCH_MAX} ids per request")
+    return await response_cache.respond(request, lambda: _consensus_batch(event_ids, db))
+
+@router.post("/batch", response_model=List[ConsensusSummary])
+async def batch_consensus(body: ConsensusBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Same as GET /api/consensus?ids=..., for ID lists too long for a URL"""
+    return await _consensus_batch(body.event_ids, db)
+
+async def _consensus_batch(event_ids: List[int], db: AsyncSession) -> List[ConsensusSummary]:
+    event_ids = list(dict.fromkeys(event_ids))
+    if not event_ids:
+        return []
+
+    source_counts = select(
+        LatestForecast.event_id,
+        func.count().label("source_count")
+    ).join(Source, Source.id == LatestForecast.source_id).filter(
+        Source.is_active == True,
+        LatestForecast.event_id.in_(event_ids)
+    ).group_by(LatestForecast.event_id).subquery()
+
+    rows = (await db.execute(
+        select(
+            Consensus.event_id,
+            Consensus.probability,
+            Consensus.disagreement,
+            Consensus.disagreement_label,
+            Consensus.confidence_interval_lower,
+            Consensus.confidence_interval_upper,
+            func.coalesce(source_counts.c.source_count, 0).label("source_count"),
+            func.coalesce(Consensus.updated_at, Consensus.timestamp).label("timestamp")
+        ).outerjoin(source_counts, source_counts.c.event_id == Consensus.event_id).filter(
+            Consensus.event_id.in_(event_ids)
+        )
+    )).all()
+    results = {row.event_id: ConsensusSummary(**row._mapping) for row in rows}
+
+    # Events not yet in the consensus table: compute them together from latest forecasts
+    missing = [event_id for event_id in event_ids if event_id not in results]
+    if missing:
+        computed = await db.run_sync(
+            lambda session: calculate_consensus_batch(query_latest_forecasts(session, missing))
+        )
+        for event_id, values in computed.items():
+            results[event_id] = ConsensusSummary(event_id=event_id, **values)
+
+    return [results[event_id] for event_id in event_ids if event_id in results]
+
 @router.get("/{event_id}", response_model=ConsensusResponse)
-async def get_consensus(event_id: int, db: Session = Depends(get_db)):
+async def get_consensus(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get current consensus probability for an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    return await response_cache.respond(request, lambda: _get_consensus(event_id, db))
+
+async def _get_consensus(event_id: int, db: AsyncSession) -> ConsensusResponse:
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Get consensus from database or calculate on the fly
-    consensus_record = db.query(Consensus).filter(Consensus.event_id == event_id).first()
+    consensus_record = (await db.execute(
+        select(Consensus).filter(Consensus.event_id == event_id)
+    )).scalars().first()
     
     if consensus_record:
         return ConsensusResponse(
@@ -44,7 +131,7 @@ async def get_consensus(event_id: int, db: Session = Depends(get_db)):
         )
     else:
         # Calculate on the fly
-        consensus_data = calculate_consensus(db, event_id)
+        consensus_data = await db.run_sync(calculate_consensus, event_id)
         if not consensus_data:
             raise HTTPException(status_code=404, detail="No forecasts available for this event")
         
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
-from app.database import get_db
-from app.models import Event, Forecast, Source
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Literal, Optional, Union
+from datetime import datetime, timedelta, timezone
+import base64
+import json
+import os
+import numpy as np
+from app.database import get_async_db
+from app.models import Event, Forecast, LatestForecast, Source
+from app.services.cache import response_cache
+from app.services.downsampling import RESOLUTIONS, bucket_aggregates, bucket_width_for, downsample
+from app.services.rollups import choose_rollup, rollup_series_query
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Series longer than this (per source) are bucketed even without max_points
+FORECASTS_MAX_POINTS = int(os.getenv("FORECASTS_MAX_POINTS", "2000"))
+
+# Events per page of GET /api/events, by default and at most
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "100"))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", "1000"))
+
 class EventResponse(BaseModel):
     id: int
     title: str
@@ -25,69 +42,332 @@ class ForecastPoint(BaseModel):
     timestamp: datetime
     probability: float
     source_name: str
+    # Bucket aggregates, present when the series is downsampled
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
 
 class EventForecastsResponse(BaseModel):
     event_id: int
     event_title: str
     forecasts: List[ForecastPoint]
 
+class SourceSeries(BaseModel):
+    t: List[datetime]
+    p: List[float]
+    mean: Optional[List[float]] = None
+    min: Optional[List[float]] = None
+    max: Optional[List[float]] = None
+
+class EventForecastSeriesResponse(BaseModel):
+    event_id: int
+    event_title: str
+    series: Dict[str, SourceSeries]
+
+class LatestForecastPoint(BaseModel):
+    source_name: str
+    probability: float
+    timestamp: Optional[datetime]
+
+class EventLatestResponse(BaseModel):
+    event_id: int
+    event_title: str
+    forecasts: List[LatestForecastPoint]
+
 @router.get("/", response_model=List[EventResponse])
 async def list_events(
+    request: Request,
     category: Optional[str] = None,
     resolved: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all events, optionally filtered by category or resolution status"""
-    query = db.query(Event)
+    """
+    List events, newest first, optionally filtered by category or resolution status.
+    Returns at most `limit` events; when there are more, the `X-Next-Cursor`
+    response header holds the `cursor` for the next page.
+    `fields` (comma-separated, e.g. `id,title`) returns only those fields.
+    """
+    return await response_cache.respond(
+        request, lambda: _list_events(category, resolved, limit, cursor, fields, db)
+    )
+
+def encode_cursor(created_at: datetime, event_id: int) -> str:
+    """Opaque cursor for the position just after an event in the listing order"""
+    payload = json.dumps([created_at.isoformat(), event_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, event_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(event_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in EventResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+async def _list_events(
+    category: Optional[str],
+    resolved: Optional[bool],
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[str],
+    db: AsyncSession
+) -> JSONResponse:
+    names = _parse_fields(fields)
+    columns = [getattr(Event, name) for name in (names or EventResponse.model_fields)]
+    sort_key = Event.created_at
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite stores created_at as text: "YYYY-MM-DD HH:MM:SS" from the server
+        # default, with microseconds when written from Python. Compare and sort
+        # one normalized form so the cursor row itself never matches "<".
+        sort_key = func.strftime("%Y-%m-%d %H:%M:%f", Event.created_at)
+    # The cursor needs the sort key of the last row even when it isn't requested
+    query = select(*columns, Event.created_at.label("_created_at"), Event.id.label("_id"))
     
     if category:
         query = query.filter(Event.category == category)
     if resolved is not None:
         query = query.filter(Event.resolved == resolved)
+    if cursor:
+        # Keyset: rows strictly after the cursor in (created_at, id) descending
+        # order, read straight off the composite indexes instead of skipping an offset
+        created_at, event_id = decode_cursor(cursor)
+        if sort_key is not Event.created_at:
+            created_at = func.strftime("%Y-%m-%d %H:%M:%f", created_at.strftime("%Y-%m-%d %H:%M:%S.%f"))
+        query = query.filter(or_(
+            sort_key < created_at,
+            and_(sort_key == created_at, Event.id < event_id)
+        ))
+    
+    query = query.order_by(sort_key.desc(), Event.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]._created_at, rows[-1]._id)
     
-    events = query.order_by(Event.created_at.desc()).all()
-    return events
+    if names is None:
+        body = [EventResponse.model_validate(row._mapping) for row in rows]
+    else:
+        body = [{name: row._mapping[name] for name in names} for row in rows]
+    return JSONResponse(jsonable_encoder(body), headers=headers)
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: int, db: Session = Depends(get_db)):
+async def get_event(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific event by ID"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    return await response_cache.respond(request, lambda: _get_event(event_id, db))
+
+async def _get_event(event_id: int, db: AsyncSession) -> EventResponse:
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return EventResponse.model_validate(event)
 
-@router.get("/{event_id}/forecasts", response_model=EventForecastsResponse)
+@router.get(
+    "/{event_id}/forecasts",
+    response_model=Union[EventForecastsResponse, EventForecastSeriesResponse]
+)
 async def get_event_forecasts(
     event_id: int,
+    request: Request,
     hours: Optional[int] = 24,  # Default to last 24 hours
-    db: Session = Depends(get_db)
+    format: Literal["rows", "columnar"] = "rows",
+    resolution: Optional[Literal[tuple(RESOLUTIONS)]] = None,
+    max_points: Optional[int] = Query(None, ge=2, le=10000),
+    method: Literal["bucket", "lttb"] = "bucket",
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get forecast time-series for an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """
+    Get forecast time-series for an event.
+    `format=columnar` returns one {t: [...], p: [...]} series per source.
+    `resolution` buckets each source's series (last value plus mean/min/max),
+    `max_points` caps points per source by bucketing or, with `method=lttb`,
+    by LTTB; it defaults to FORECASTS_MAX_POINTS, and a `resolution` that
+    would give more buckets than that over `hours` is widened.
+    Buckets of an hour or more are read from the hourly/daily rollups.
+    """
+    return await response_cache.respond(
+        request,
+        lambda: _get_event_forecasts(event_id, hours, format, resolution, max_points, method, db)
+    )
+
+async def _get_event_forecasts(
+    event_id: int,
+    hours: int,
+    format: str,
+    resolution: Optional[str],
+    max_points: Optional[int],
+    method: str,
+    db: AsyncSession
+) -> JSONResponse:
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Get forecasts from the last N hours
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
     
-    forecasts = db.query(Forecast).filter(
-        Forecast.event_id == event_id,
-        Forecast.timestamp >= cutoff_time
-    ).order_by(Forecast.timestamp.asc()).all()
-    
-    # Group by source and format
-    forecast_points = []
-    for forecast in forecasts:
-        source = db.query(Source).filter(Source.id == forecast.source_id).first()
-        forecast_points.append(ForecastPoint(
-            timestamp=forecast.timestamp,
-            probability=forecast.probability,
-            source_name=source.display_name if source else "Unknown"
-        ))
+    # No response carries more than this many points per source
+    limit = max_points or FORECASTS_MAX_POINTS
+    resolution_width = None
+    if resolution:
+        # A window of N widths can straddle N + 1 aligned buckets
+        resolution_width = max(RESOLUTIONS[resolution], bucket_width_for(hours * 3600, limit - 1))
+    
+    # Coarse buckets are served from the coarsest rollup that divides them
+    width = resolution_width
+    if width is None and max_points is not None and method == "bucket":
+        width = bucket_width_for(hours * 3600, max_points - 1)
+    rollup = choose_rollup(width) if width and method == "bucket" else None
+    if rollup:
+        rows = (await db.execute(rollup_series_query(event_id, cutoff_time, rollup))).all()
+        series = _rollup_series(rows, width)
+        return _series_response(event, series, format)
+    
+    # Join sources in the same query and read plain tuples, no ORM objects
+    rows = (await db.execute(
+        select(
+            Forecast.timestamp,
+            Forecast.probability,
+            func.coalesce(Source.display_name, "Unknown")
+        ).outerjoin(Source, Source.id == Forecast.source_id).filter(
+            Forecast.event_id == event_id,
+            Forecast.timestamp >= cutoff_time
+        ).order_by(Forecast.timestamp.asc())
+    )).tuples().all()
+    
+    # Group into per-source arrays for downsampling
+    grouped = {}
+    for timestamp, probability, source_name in rows:
+        points = grouped.get(source_name)
+        if points is None:
+            points = grouped[source_name] = ([], [])
+        points[0].append(timestamp)
+        points[1].append(probability)
+    
+    if resolution is None and max_points is None:
+        if all(len(ts) <= limit for ts, _ in grouped.values()):
+            return _raw_forecasts_response(event, rows, grouped, format)
+    
+    # With a resolution the (widened) buckets already bound the series;
+    # otherwise cap it at `limit` by bucketing or LTTB
+    if resolution_width is None:
+        max_points = limit
+    series = {}
+    for source_name, (timestamps, probabilities) in grouped.items():
+        epoch = np.array([_epoch_seconds(t) for t in timestamps])
+        series[source_name] = downsample(
+            epoch, np.array(probabilities, dtype=float),
+            width=resolution_width, max_points=max_points, method=method
+        )
+    return _series_response(event, series, format)
+
+def _rollup_series(rows, width: float) -> Dict[str, Dict]:
+    """Per-source series re-bucketed to `width` from rollup_series_query() rows"""
+    grouped = {}
+    for bucket, source_name, close, high, low, total, count in rows:
+        columns = grouped.get(source_name)
+        if columns is None:
+            columns = grouped[source_name] = ([], [], [], [], [], [])
+        for column, value in zip(columns, (_epoch_seconds(bucket), close, low, high, total, count)):
+            column.append(value)
+    
+    return {
+        source_name: bucket_aggregates(*(np.array(column, dtype=float) for column in columns), width)
+        for source_name, columns in grouped.items()
+    }
+
+def _series_response(event: Event, series: Dict[str, Dict], format: str) -> JSONResponse:
+    """Downsampled per-source series in the requested response shape"""
+    event_id = event.id
+    if format == "columnar":
+        return JSONResponse({
+            "event_id": event_id,
+            "event_title": event.title,
+            "series": {
+                source_name: {
+                    "t": [_iso(t) for t in points["t"]],
+                    "p": points["last"].tolist(),
+                    **{key: points[key].tolist() for key in ("mean", "min", "max") if key in points}
+                }
+                for source_name, points in series.items()
+            }
+        })
     
-    return EventForecastsResponse(
+    forecasts = []
+    for source_name, points in series.items():
+        aggregates = [key for key in ("mean", "min", "max") if key in points]
+        for i, t in enumerate(points["t"]):
+            point = {"timestamp": _iso(t), "probability": float(points["last"][i]), "source_name": source_name}
+            for key in aggregates:
+                point[key] = float(points[key][i])
+            forecasts.append(point)
+    forecasts.sort(key=lambda point: point["timestamp"])
+    return JSONResponse({"event_id": event_id, "event_title": event.title, "forecasts": forecasts})
+
+def _raw_forecasts_response(event: Event, rows, grouped, format: str) -> JSONResponse:
+    """Every point in the window, already in response shape (no model validation)"""
+    if format == "columnar":
+        series = {
+            source_name: {"t": [t.isoformat() for t in timestamps], "p": probabilities}
+            for source_name, (timestamps, probabilities) in grouped.items()
+        }
+        return JSONResponse({"event_id": event.id, "event_title": event.title, "series": series})
+    
+    return JSONResponse({
+        "event_id": event.id,
+        "event_title": event.title,
+        "forecasts": [
+            {"timestamp": timestamp.isoformat(), "probability": probability, "source_name": source_name}
+            for timestamp, probability, source_name in rows
+        ]
+    })
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    """Epoch seconds, treating naive timestamps as UTC"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+def _iso(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(float(epoch_seconds), tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+@router.get("/{event_id}/latest", response_model=EventLatestResponse)
+async def get_event_latest(event_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get the current probability from each source for an event"""
+    return await response_cache.respond(request, lambda: _get_event_latest(event_id, db))
+
+async def _get_event_latest(event_id: int, db: AsyncSession) -> EventLatestResponse:
+    event = await db.get(Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    rows = (await db.execute(
+        select(
+            Source.display_name,
+            LatestForecast.probability,
+            LatestForecast.timestamp
+        ).join(Source, Source.id == LatestForecast.source_id).filter(
+            LatestForecast.event_id == event_id
+        ).order_by(Source.id)
+    )).all()
+    
+    return EventLatestResponse(
         event_id=event_id,
         event_title=event.title,
-        forecasts=forecast_points
+        forecasts=[
+            LatestForecastPoint(source_name=name, probability=probability, timestamp=timestamp)
+            for name, probability, timestamp in rows
+        ]
     )
-
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Source
 from pydantic import BaseModel
 
@@ -18,15 +19,15 @@ class SourceResponse(BaseModel):
         from_attributes = True
 
 @router.get("/", response_model=List[SourceResponse])
-async def list_sources(db: Session = Depends(get_db)):
+async def list_sources(db: AsyncSession = Depends(get_async_db)):
     """List all data sources"""
-    sources = db.query(Source).all()
+    sources = (await db.execute(select(Source))).scalars().all()
     return sources
 
 @router.get("/{source_id}", response_model=SourceResponse)
-async def get_source(source_id: int, db: Session = Depends(get_db)):
+async def get_source(source_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific source by ID"""
-    source = db.query(Source).filter(Source.id == source_id).first()
+    source = await db.get(Source, source_id)
     if not source:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Source not found")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import os
+from app.services.pubsub import broker
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+@router.get("")
+async def stream_updates(
+    request: Request,
+    event_ids: Optional[str] = Query(None, description="Comma-separated event ids; all events if omitted")
+):
+    """
+    Server-Sent Events stream of updates pushed after each ingestion cycle.
+    `consensus` events carry an event's new consensus values (only when they
+    changed); `forecasts` events carry the forecast points just appended.
+    """
+    try:
+        wanted = {int(event_id) for event_id in event_ids.split(",") if event_id.strip()} if event_ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="event_ids must be comma-separated integers")
+
+    async def events():
+        async with broker.subscribe() as queue:
+            yield "retry: 3000\n: connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if wanted is not None and message["event_id"] not in wanted:
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
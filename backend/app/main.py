@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import events, consensus, sources
-from app.database import engine, Base
+from app.api import events, consensus, sources, stream
+from app.database import engine, Base, create_indexes, dispose_async_engine, get_pool_metrics
+from app.services.ingestion.http_client import close_clients, get_fetch_stats, get_pool_stats
+from app.services.cache import response_cache
+from app.services.pubsub import broker, start_bridge, stop_bridge
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+create_indexes()
 
 app = FastAPI(
     title="Consensus Forecast Aggregator API",
@@ -19,12 +23,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
 app.include_router(events.router, prefix="/api/events", tags=["events"])
 app.include_router(consensus.router, prefix="/api/consensus", tags=["consensus"])
 app.include_router(sources.router, prefix="/api/sources", tags=["sources"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
 
 @app.get("/")
 async def root():
@@ -34,3 +40,24 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Outbound HTTP and database pool usage, API response cache stats and stream subscribers"""
+    return {
+        "http_pools": get_pool_stats(),
+        "http_fetches": get_fetch_stats(),
+        "db_pools": get_pool_metrics(),
+        "response_cache": response_cache.get_stats(),
+        "stream_subscribers": broker.subscriber_count(),
+    }
+
+@app.on_event("startup")
+async def startup():
+    start_bridge()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_bridge()
+    await close_clients()
+    await dispose_async_engine()
+
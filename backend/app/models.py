@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -37,6 +37,18 @@ class Event(Base):
     metaculus_id = Column(String, nullable=True)
     public_model_id = Column(String, nullable=True)
 
+# Keyset pages of the events listing (newest first), one index per filter combination
+Index("ix_events_created_id", Event.created_at.desc(), Event.id.desc())
+Index("ix_events_category_created_id", Event.category, Event.created_at.desc(), Event.id.desc())
+Index("ix_events_resolved_created_id", Event.resolved, Event.created_at.desc(), Event.id.desc())
+Index(
+    "ix_events_category_resolved_created_id",
+    Event.category,
+    Event.resolved,
+    Event.created_at.desc(),
+    Event.id.desc()
+)
+
 class Forecast(Base):
     __tablename__ = "forecasts"
     
@@ -50,6 +62,48 @@ class Forecast(Base):
     event = relationship("Event", back_populates="forecasts")
     source = relationship("Source", back_populates="forecasts")
 
+# Serves "latest forecast per (event, source)" lookups without scanning history
+Index(
+    "ix_forecasts_event_source_timestamp",
+    Forecast.event_id,
+    Forecast.source_id,
+    Forecast.timestamp.desc()
+)
+
+class LatestForecast(Base):
+    """Current probability per (event, source), upserted on every ingest"""
+    __tablename__ = "latest_forecasts"
+    
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    probability = Column(Float)
+    timestamp = Column(DateTime(timezone=True))
+
+class ForecastRollup(Base):
+    """Hourly ("1h") and daily ("1d") OHLC aggregates of forecasts per (event, source)"""
+    __tablename__ = "forecast_rollups"
+    
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    resolution = Column(String, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    sum = Column(Float)  # Sum of probabilities, for bucket means
+    count = Column(Integer)
+    open_timestamp = Column(DateTime(timezone=True))
+    close_timestamp = Column(DateTime(timezone=True))
+
+# Range scans of one event's series across all sources at a given resolution
+Index(
+    "ix_forecast_rollups_event_resolution_bucket",
+    ForecastRollup.event_id,
+    ForecastRollup.resolution,
+    ForecastRollup.bucket_start
+)
+
 class Consensus(Base):
     __tablename__ = "consensus"
     
@@ -65,3 +119,13 @@ class Consensus(Base):
     
     event = relationship("Event")
 
+class IngestionCheckpoint(Base):
+    """Progress of the current full ingestion cycle, so an interrupted cycle can resume"""
+    __tablename__ = "ingestion_checkpoints"
+    
+    name = Column(String, primary_key=True)  # e.g. "ingestion"
+    started_at = Column(DateTime(timezone=True))
+    last_event_id = Column(Integer, nullable=True)  # Events are ingested in id order; all up to this one are committed
+    events_done = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,249 @@
+import os
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Forecast, ForecastRollup
+from app.services.rollups import upsert_rollups
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # Archival is optional; the API and ingestion don't need it
+    PYARROW_AVAILABLE = False
+
+# Raw forecasts older than this many days are moved to Parquet (0 disables archival)
+FORECAST_RETENTION_DAYS = int(os.getenv("FORECAST_RETENTION_DAYS", "90"))
+FORECAST_ARCHIVE_DIR = os.getenv(
+    "FORECAST_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "archive", "forecasts")
+)
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "50000"))
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Forecast archival requires pyarrow (pip install pyarrow)")
+
+def _schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("event_id", pa.int64()),
+        ("source_id", pa.int64()),
+        ("probability", pa.float64()),
+        ("timestamp", pa.timestamp("us")),
+        ("raw_data", pa.binary()),  # zlib-compressed UTF-8 JSON
+    ])
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def _record_batch(rows: List[Dict]):
+    return pa.RecordBatch.from_pylist([
+        {
+            "id": row["id"],
+            "event_id": row["event_id"],
+            "source_id": row["source_id"],
+            "probability": row["probability"],
+            "timestamp": _naive_utc(row["timestamp"]),
+            "raw_data": zlib.compress(row["raw_data"].encode()) if row["raw_data"] is not None else None,
+        }
+        for row in rows
+    ], schema=_schema())
+
+def archive_day(db: Session, day: datetime, archive_dir: str = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move one UTC day of raw forecasts into a Parquet file under
+    `archive_dir/date=YYYY-MM-DD/` and delete them from the forecasts table.
+
+    The day's hourly/daily rollups are rebuilt from the same rows first, so the
+    aggregates left in SQL are exact. The file is written before anything is
+    deleted and the deletes commit together; if a run dies in between, the next
+    run re-archives the day and the reader drops the duplicate ids.
+    Returns the number of rows archived.
+    """
+    _require_pyarrow()
+    archive_dir = archive_dir or FORECAST_ARCHIVE_DIR
+    next_day = day + timedelta(days=1)
+    in_day = (Forecast.timestamp >= day, Forecast.timestamp < next_day)
+
+    rows = db.query(
+        Forecast.id,
+        Forecast.event_id,
+        Forecast.source_id,
+        Forecast.probability,
+        Forecast.timestamp,
+        Forecast.raw_data
+    ).filter(*in_day).order_by(Forecast.timestamp, Forecast.id)
+
+    partition = os.path.join(archive_dir, f"date={day:%Y-%m-%d}")
+    partial = os.path.join(partition, f".{uuid.uuid4().hex}.parquet.tmp")
+
+    db.query(ForecastRollup).filter(
+        ForecastRollup.bucket_start >= day,
+        ForecastRollup.bucket_start < next_day
+    ).delete(synchronize_session=False)
+
+    total = 0
+    writer = None
+
+    def write(batch):
+        nonlocal writer, total
+        if writer is None:
+            os.makedirs(partition, exist_ok=True)
+            writer = pq.ParquetWriter(partial, _schema(), compression="zstd")
+        writer.write_batch(_record_batch(batch))
+        upsert_rollups(db, batch)
+        total += len(batch)
+
+    try:
+        batch = []
+        for row in rows.yield_per(batch_size):
+            batch.append(row._asdict())
+            if len(batch) >= batch_size:
+                write(batch)
+                batch = []
+        if batch:
+            write(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if total == 0:
+        db.rollback()
+        return 0
+
+    os.replace(partial, os.path.join(partition, f"forecasts-{uuid.uuid4().hex[:12]}.parquet"))
+    db.query(Forecast).filter(*in_day).delete(synchronize_session=False)
+    db.commit()
+    return total
+
+def archive_forecasts(db: Session, retention_days: Optional[int] = None, archive_dir: str = None) -> Dict:
+    """
+    Apply the retention policy: archive every whole UTC day of raw forecasts
+    older than `retention_days` (default FORECAST_RETENTION_DAYS), oldest first.
+    Returns a summary with the cutoff and the number of days and rows archived.
+    """
+    retention_days = FORECAST_RETENTION_DAYS if retention_days is None else retention_days
+    summary = {"cutoff": None, "days": 0, "rows": 0}
+    if retention_days <= 0:
+        return summary
+
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    summary["cutoff"] = cutoff.isoformat()
+
+    oldest = db.query(func.min(Forecast.timestamp)).filter(Forecast.timestamp < cutoff).scalar()
+    if oldest is None:
+        return summary
+
+    day = _naive_utc(oldest).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < cutoff:
+        archived = archive_day(db, day, archive_dir)
+        if archived:
+            summary["days"] += 1
+            summary["rows"] += archived
+        day += timedelta(days=1)
+    return summary
+
+def read_archived_forecasts(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    event_ids: Optional[List[int]] = None,
+    source_ids: Optional[List[int]] = None,
+    include_raw: bool = False,
+    archive_dir: str = None
+):
+    """
+    Load archived forecasts as a pandas DataFrame (id, event_id, source_id,
+    probability, timestamp[, raw_data]) for backtests. Date partitions outside
+    [start, end) are skipped without being opened. `raw_data` is decompressed
+    back to JSON text when `include_raw` is set.
+    """
+    _require_pyarrow()
+    import pandas as pd
+
+    archive_dir = archive_dir or FORECAST_ARCHIVE_DIR
+    columns = [field.name for field in _schema() if include_raw or field.name != "raw_data"]
+    if not os.path.isdir(archive_dir):
+        return pd.DataFrame(columns=columns)
+
+    dataset = ds.dataset(
+        archive_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        exclude_invalid_files=True
+    )
+
+    filters = []
+    if start is not None:
+        start = _naive_utc(start)
+        filters.append(ds.field("date") >= f"{start:%Y-%m-%d}")
+        filters.append(ds.field("timestamp") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        end = _naive_utc(end)
+        filters.append(ds.field("date") <= f"{end:%Y-%m-%d}")
+        filters.append(ds.field("timestamp") < pa.scalar(end, pa.timestamp("us")))
+    if event_ids is not None:
+        filters.append(ds.field("event_id").isin(list(event_ids)))
+    if source_ids is not None:
+        filters.append(ds.field("source_id").isin(list(source_ids)))
+
+    expression = None
+    for condition in filters:
+        expression = condition if expression is None else expression & condition
+
+    df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+    df = df.drop_duplicates("id").sort_values(["timestamp", "id"]).reset_index(drop=True)
+    if include_raw:
+        df["raw_data"] = df["raw_data"].map(lambda blob: zlib.decompress(blob).decode() if blob is not None else None)
+    return df
+
+def read_forecast_history(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    event_ids: Optional[List[int]] = None,
+    source_ids: Optional[List[int]] = None,
+    archive_dir: str = None
+):
+    """
+    Raw forecast history across the Parquet archive and the hot table, as one
+    DataFrame (id, event_id, source_id, probability, timestamp).
+    """
+    import pandas as pd
+
+    query = db.query(
+        Forecast.id,
+        Forecast.event_id,
+        Forecast.source_id,
+        Forecast.probability,
+        Forecast.timestamp
+    )
+    if start is not None:
+        query = query.filter(Forecast.timestamp >= start)
+    if end is not None:
+        query = query.filter(Forecast.timestamp < end)
+    if event_ids is not None:
+        query = query.filter(Forecast.event_id.in_(event_ids))
+    if source_ids is not None:
+        query = query.filter(Forecast.source_id.in_(source_ids))
+
+    hot = pd.DataFrame(
+        [row._asdict() for row in query.all()],
+        columns=["id", "event_id", "source_id", "probability", "timestamp"]
+    )
+    hot["timestamp"] = pd.to_datetime(hot["timestamp"], utc=True).dt.tz_localize(None)
+
+    frames = [hot]
+    if PYARROW_AVAILABLE:
+        frames.insert(0, read_archived_forecasts(start, end, event_ids, source_ids, archive_dir=archive_dir))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return hot
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates("id").sort_values(["timestamp", "id"]).reset_index(drop=True)
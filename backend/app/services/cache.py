@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:  # Redis is optional; without it the cache is per process
+    REDIS_AVAILABLE = False
+
+# Seconds a cached response may be served before it is rebuilt, even
+# without an ingest in between (responses with a sliding time window age)
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Shared store for the data version and cached bodies, e.g. redis://localhost:6379/0
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Without Redis, the worker and web processes share the version through this file
+CACHE_VERSION_FILE = os.getenv(
+    "CACHE_VERSION_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache_version")
+)
+
+VERSION_KEY = "forecast-cache:version"
+
+_redis = None
+
+def _get_redis():
+    """Shared Redis client, or None if Redis isn't configured or installed"""
+    global _redis
+    if _redis is None and REDIS_URL and REDIS_AVAILABLE:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5)
+    return _redis
+
+class _VersionFile:
+    """Data version kept in a small file, re-read only when its mtime changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = None
+        self.version = 0
+        self.lock = threading.RLock()
+
+    def get(self) -> int:
+        try:
+            stat = os.stat(self.path)
+            mtime = (stat.st_mtime_ns, stat.st_ino)  # bumps replace the file
+        except FileNotFoundError:
+            return 0
+        if mtime != self.mtime:
+            with self.lock:
+                try:
+                    with open(self.path) as f:
+                        self.version = int(f.read().strip() or 0)
+                    self.mtime = mtime
+                except (OSError, ValueError):
+                    pass
+        return self.version
+
+    def bump(self) -> int:
+        with self.lock:
+            self.mtime = None
+            version = self.get() + 1
+            partial = f"{self.path}.{os.getpid()}.tmp"
+            with open(partial, "w") as f:
+                f.write(str(version))
+            os.replace(partial, self.path)
+            return version
+
+_version_file = _VersionFile(CACHE_VERSION_FILE)
+
+def get_version() -> int:
+    """Current data version; changes whenever ingestion commits new data"""
+    client = _get_redis()
+    if client is not None:
+        try:
+            return int(client.get(VERSION_KEY) or 0)
+        except redis.RedisError:
+            pass
+    return _version_file.get()
+
+def bump_version() -> int:
+    """Invalidate every cached response, in this and all other processes"""
+    version = _version_file.bump()
+    client = _get_redis()
+    if client is not None:
+        try:
+            version = client.incr(VERSION_KEY)
+        except redis.RedisError as e:
+            print(f"Could not bump cache version in Redis: {e}")
+    return version
+
+class ResponseCache:
+    """
+    TTL/LRU cache of serialized JSON responses, keyed by request path and
+    query string. An entry is only valid for the data version it was built
+    under, so bump_version() invalidates everything at once. Headers the
+    built response sets itself (e.g. a pagination cursor) are kept with the
+    body. When REDIS_URL is set, entries are also shared between processes
+    through Redis.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[int, float, str, bytes, Dict[str, str]]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "not_modified": 0}
+
+    def _lookup(self, key: str, version: int) -> Optional[Tuple[str, bytes, Dict[str, str]]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry_version, expires, etag, body, headers = entry
+                if entry_version == version and expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return etag, body, headers
+                del self.entries[key]
+
+        client = _get_redis()
+        if client is not None:
+            try:
+                shared = client.get(f"forecast-cache:{version}:{key}")
+            except redis.RedisError:
+                shared = None
+            if shared is not None:
+                etag, headers, body = shared.split(b"\n", 2)
+                etag, headers = etag.decode(), json.loads(headers)
+                self._store(key, version, etag, body, headers)
+                with self.lock:
+                    self.stats["shared_hits"] += 1
+                return etag, body, headers
+        return None
+
+    def _store(self, key: str, version: int, etag: str, body: bytes, headers: Dict[str, str]):
+        with self.lock:
+            self.entries[key] = (version, time.monotonic() + self.ttl, etag, body, headers)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    async def respond(self, request: Request, build: Callable[[], Awaitable[object]]) -> Response:
+        """
+        Serve the cached JSON body for this request, or await `build()` (which
+        returns a Response or anything jsonable) and cache its result.
+        Answers 304 when If-None-Match carries the current ETag.
+        """
+        if not CACHE_ENABLED:
+            return _as_response(await build())
+
+        key = request.url.path
+        if request.url.query:
+            key += "?" + "&".join(sorted(request.url.query.split("&")))
+        version = get_version()
+
+        cached = self._lookup(key, version)
+        if cached is None:
+            with self.lock:
+                self.stats["misses"] += 1
+            response = _as_response(await build())
+            if response.status_code != 200:
+                return response
+            body = bytes(response.body)
+            # Content-based, so an unchanged body still revalidates after an ingest
+            etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            extra_headers = {
+                name: value for name, value in response.headers.items()
+                if name not in ("content-length", "content-type")
+            }
+            self._store(key, version, etag, body, extra_headers)
+            client = _get_redis()
+            if client is not None:
+                try:
+                    shared = b"\n".join((etag.encode(), json.dumps(extra_headers).encode(), body))
+                    client.setex(f"forecast-cache:{version}:{key}", int(self.ttl), shared)
+                except redis.RedisError:
+                    pass
+        else:
+            etag, body, extra_headers = cached
+
+        headers = {**extra_headers, "ETag": etag, "Cache-Control": "no-cache"}
+        if etag in _parse_if_none_match(request.headers.get("if-none-match")):
+            with self.lock:
+                self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            served = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self.entries),
+                "version": get_version(),
+                "hit_rate": round((self.stats["hits"] + self.stats["shared_hits"]) / served, 3) if served else None,
+                "backend": "redis" if _get_redis() is not None else "local",
+            }
+
+def _as_response(result) -> Response:
+    if isinstance(result, Response):
+        return result
+    body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+    return Response(content=body, media_type="application/json")
+
+def _parse_if_none_match(header: Optional[str]):
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+response_cache = ResponseCache()
@@ -1,49 +1,32 @@
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 from sqlalchemy.orm import Session
-from app.models import Forecast, Source, Event, Consensus
+from app.database import dialect_insert, upsert_batches
+from app.models import Forecast, Source, Event, Consensus, LatestForecast
 from datetime import datetime
 
 def calculate_consensus(
     db: Session,
     event_id: int,
-    forecasts: List[Forecast] = None
+    forecasts: List[Forecast] = None,
+    rng: Optional[np.random.Generator] = None
 ) -> Dict:
     """
     Calculate consensus probability, disagreement, and confidence interval
     for a given event.
     """
     if forecasts is None:
-        # Get latest forecasts from all sources for this event
-        forecasts = db.query(Forecast).filter(
-            Forecast.event_id == event_id
-        ).order_by(Forecast.timestamp.desc()).all()
-    
-    if not forecasts:
-        return None
-    
-    # Group by source and get latest probability per source
-    source_probs = {}
-    source_weights = {}
+        # Latest forecast per active source, from the latest_forecasts table
+        rows = query_latest_forecasts(db, [event_id])
+    else:
+        rows = _latest_per_source(db, event_id, forecasts)
     
-    for forecast in forecasts:
-        source_id = forecast.source_id
-        if source_id not in source_probs or forecast.timestamp > source_probs[source_id][1]:
-            source_probs[source_id] = (forecast.probability, forecast.timestamp)
-    
-    # Get weights for each source
-    for source_id, (prob, ts) in source_probs.items():
-        source = db.query(Source).filter(Source.id == source_id).first()
-        if source and source.is_active:
-            source_weights[source_id] = source.weight
-            source_probs[source_id] = prob
-    
-    if not source_probs:
+    if not rows:
         return None
     
     # Extract probabilities and weights
-    probabilities = list(source_probs.values())
-    weights = [source_weights.get(sid, 1.0) for sid in source_probs.keys()]
+    probabilities = [row[2] for row in rows]
+    weights = [1.0 if row[4] is None else row[4] for row in rows]
     
     # Normalize weights
     total_weight = sum(weights)
@@ -59,15 +42,10 @@ def calculate_consensus(
     disagreement = np.std(probabilities)
     
     # Classify disagreement
-    if disagreement < 0.05:
-        disagreement_label = "Low"
-    elif disagreement < 0.15:
-        disagreement_label = "Medium"
-    else:
-        disagreement_label = "High"
+    disagreement_label = label_disagreement(disagreement)
     
     # Calculate confidence interval using bootstrap method
-    ci_lower, ci_upper = calculate_confidence_interval(probabilities, weights)
+    ci_lower, ci_upper = calculate_confidence_interval(probabilities, weights, rng=rng)
     
     return {
         "probability": consensus_prob,
@@ -79,44 +57,117 @@ def calculate_consensus(
         "timestamp": datetime.utcnow()
     }
 
+def _latest_per_source(db: Session, event_id: int, forecasts: List[Forecast]):
+    """Reduce an explicit list of forecasts to the latest per active source"""
+    latest = {}
+    for forecast in forecasts:
+        current = latest.get(forecast.source_id)
+        if current is None or forecast.timestamp > current.timestamp:
+            latest[forecast.source_id] = forecast
+    
+    sources = {
+        source.id: source
+        for source in db.query(Source).filter(Source.id.in_(latest.keys())).all()
+    }
+    return [
+        (event_id, source_id, forecast.probability, forecast.timestamp, sources[source_id].weight)
+        for source_id, forecast in latest.items()
+        if source_id in sources and sources[source_id].is_active
+    ]
+
 def calculate_confidence_interval(
     probabilities: List[float],
     weights: List[float],
     confidence: float = 0.90,
-    n_bootstrap: int = 1000
+    n_bootstrap: int = 1000,
+    rng: Optional[np.random.Generator] = None
 ) -> Tuple[float, float]:
     """
     Calculate confidence interval using bootstrap method.
+    Pass a seeded `rng` (np.random.default_rng(seed)) for reproducible intervals.
     """
     if len(probabilities) < 2:
         # If only one source, use a simple uncertainty estimate
         return max(0.0, probabilities[0] - 0.05), min(1.0, probabilities[0] + 0.05)
     
-    bootstrap_samples = []
-    for _ in range(n_bootstrap):
-        # Resample with replacement
-        indices = np.random.choice(len(probabilities), size=len(probabilities), replace=True)
-        resampled_probs = [probabilities[i] for i in indices]
-        resampled_weights = [weights[i] for i in indices]
-        
-        # Normalize weights
-        total = sum(resampled_weights)
-        if total > 0:
-            resampled_weights = [w / total for w in resampled_weights]
-        
-        # Calculate weighted average
-        sample_consensus = sum(p * w for p, w in zip(resampled_probs, resampled_weights))
-        bootstrap_samples.append(sample_consensus)
+    lower, upper = calculate_confidence_intervals(
+        [probabilities], [weights], confidence=confidence, n_bootstrap=n_bootstrap, rng=rng
+    )
+    return float(lower[0]), float(upper[0])
+
+def _pad(rows: Union[np.ndarray, Sequence[Sequence[float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn a ragged list of per-event values into a NaN-padded 2-D array.
+    Returns (padded values, number of valid values per row).
+    """
+    if isinstance(rows, np.ndarray) and rows.ndim == 2:
+        values = rows.astype(float)
+        return values, (~np.isnan(values)).sum(axis=1)
+    
+    lengths = np.array([len(row) for row in rows], dtype=int)
+    values = np.full((len(rows), max(lengths.max(initial=0), 1)), np.nan)
+    for i, row in enumerate(rows):
+        values[i, :lengths[i]] = row
+    return values, lengths
+
+def calculate_confidence_intervals(
+    probabilities: Union[np.ndarray, Sequence[Sequence[float]]],
+    weights: Union[np.ndarray, Sequence[Sequence[float]]],
+    confidence: float = 0.90,
+    n_bootstrap: int = 1000,
+    rng: Optional[np.random.Generator] = None,
+    max_block_size: int = 2_000_000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bootstrap confidence intervals for many events in one call.
+
+    `probabilities` and `weights` are either ragged lists (one row per event)
+    or 2-D arrays padded with NaN after each event's sources. All bootstrap
+    index matrices are drawn at once and the weighted means are computed
+    with array operations, in blocks of at most `max_block_size` elements.
+    Events with fewer than two sources get the same ±0.05 band as the
+    single-event function.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    
+    probs, counts = _pad(probabilities)
+    wts, _ = _pad(weights)
+    probs = np.nan_to_num(probs)
+    wts = np.nan_to_num(wts)
+    n_events, width = probs.shape
     
-    # Calculate percentiles
     alpha = 1 - confidence
-    lower_percentile = (alpha / 2) * 100
-    upper_percentile = (1 - alpha / 2) * 100
+    percentiles = [(alpha / 2) * 100, (1 - alpha / 2) * 100]
     
-    ci_lower = np.percentile(bootstrap_samples, lower_percentile)
-    ci_upper = np.percentile(bootstrap_samples, upper_percentile)
+    # Single-source events: simple uncertainty estimate
+    lower = np.clip(probs[:, 0] - 0.05, 0.0, 1.0)
+    upper = np.clip(probs[:, 0] + 0.05, 0.0, 1.0)
     
-    return float(ci_lower), float(ci_upper)
+    multi = np.flatnonzero(counts >= 2)
+    block = max(1, max_block_size // (n_bootstrap * width))
+    for start in range(0, len(multi), block):
+        rows = multi[start:start + block]
+        n = counts[rows][:, None, None]
+        
+        # Resample with replacement: indices in [0, n) per event, shape (events, n_bootstrap, width)
+        indices = (rng.random((len(rows), n_bootstrap, width)) * n).astype(np.intp)
+        valid = np.arange(width) < n
+        
+        row_index = rows[:, None, None]
+        sample_probs = probs[row_index, indices]
+        sample_weights = np.where(valid, wts[row_index, indices], 0.0)
+        
+        # Weighted average per bootstrap sample, normalizing weights when possible
+        totals = sample_weights.sum(axis=2)
+        weighted = (sample_probs * sample_weights).sum(axis=2)
+        samples = np.divide(weighted, totals, out=weighted.copy(), where=totals > 0)
+        
+        ci = np.percentile(samples, percentiles, axis=1)
+        lower[rows] = ci[0]
+        upper[rows] = ci[1]
+    
+    return lower, upper
 
 def update_consensus(db: Session, event_id: int):
     """Update consensus record for an event"""
@@ -149,3 +200,150 @@ def update_consensus(db: Session, event_id: int):
     db.commit()
     return consensus_data
 
+def label_disagreement(disagreement: float) -> str:
+    """Classify disagreement (standard deviation across sources)"""
+    if disagreement < 0.05:
+        return "Low"
+    elif disagreement < 0.15:
+        return "Medium"
+    else:
+        return "High"
+
+def query_latest_forecasts(db: Session, event_ids: Optional[List[int]] = None):
+    """
+    Latest forecast per (event, source) for active sources, read from the
+    latest_forecasts table so the cost does not depend on stored history.
+    Without `event_ids`, covers every unresolved event.
+
+    Returns rows of (event_id, source_id, probability, timestamp, weight).
+    """
+    query = db.query(
+        LatestForecast.event_id,
+        LatestForecast.source_id,
+        LatestForecast.probability,
+        LatestForecast.timestamp,
+        Source.weight
+    ).join(Source, Source.id == LatestForecast.source_id).filter(Source.is_active == True)
+    
+    if event_ids is None:
+        query = query.join(Event, Event.id == LatestForecast.event_id).filter(Event.resolved == False)
+    else:
+        query = query.filter(LatestForecast.event_id.in_(event_ids))
+    
+    return query.order_by(LatestForecast.event_id, LatestForecast.source_id).all()
+
+def calculate_consensus_batch(
+    rows: Sequence[Tuple],
+    rng: Optional[np.random.Generator] = None
+) -> Dict[int, Dict]:
+    """
+    Vectorized consensus for many events.
+
+    `rows` are (event_id, source_id, probability, timestamp, weight) tuples,
+    one per latest (event, source) forecast, as returned by
+    query_latest_forecasts. Returns {event_id: consensus dict} with the same
+    fields as calculate_consensus.
+    """
+    if not rows:
+        return {}
+
+    event_ids = sorted({row[0] for row in rows})
+    position = {event_id: i for i, event_id in enumerate(event_ids)}
+    counts = np.zeros(len(event_ids), dtype=int)
+    for row in rows:
+        counts[position[row[0]]] += 1
+
+    # Padded (events x sources) layout; NaN marks empty slots
+    probs = np.full((len(event_ids), counts.max()), np.nan)
+    weights = np.full_like(probs, np.nan)
+    filled = np.zeros(len(event_ids), dtype=int)
+    for event_id, _, probability, _, weight in rows:
+        i = position[event_id]
+        probs[i, filled[i]] = probability
+        weights[i, filled[i]] = 1.0 if weight is None else weight
+        filled[i] += 1
+
+    # Normalize weights, falling back to equal weights when they sum to zero
+    valid = ~np.isnan(probs)
+    totals = np.nansum(weights, axis=1, keepdims=True)
+    normalized = np.where(totals > 0, np.nan_to_num(weights) / np.where(totals > 0, totals, 1), valid / counts[:, None])
+
+    consensus_probs = np.nansum(np.nan_to_num(probs) * normalized, axis=1)
+    disagreements = np.nanstd(probs, axis=1)
+    ci_lower, ci_upper = calculate_confidence_intervals(probs, np.where(valid, normalized, np.nan), rng=rng)
+
+    timestamp = datetime.utcnow()
+    return {
+        event_id: {
+            "probability": float(consensus_probs[i]),
+            "disagreement": float(disagreements[i]),
+            "disagreement_label": label_disagreement(disagreements[i]),
+            "confidence_interval_lower": float(ci_lower[i]),
+            "confidence_interval_upper": float(ci_upper[i]),
+            "source_count": int(counts[i]),
+            "timestamp": timestamp
+        }
+        for event_id, i in position.items()
+    }
+
+def upsert_consensus(db: Session, results: Dict[int, Dict]):
+    """
+    Insert or update Consensus rows for many events, one statement per batch.
+    Does not commit; the caller owns the transaction.
+    """
+    if not results:
+        return
+
+    now = datetime.utcnow()
+    values = [
+        {
+            "event_id": event_id,
+            "probability": data["probability"],
+            "disagreement": data["disagreement"],
+            "disagreement_label": data["disagreement_label"],
+            "confidence_interval_lower": data["confidence_interval_lower"],
+            "confidence_interval_upper": data["confidence_interval_upper"],
+            "updated_at": now
+        }
+        for event_id, data in results.items()
+    ]
+
+    insert = dialect_insert(db)
+    if insert is None:
+        # No native upsert: fall back to the per-row ORM path
+        for value in values:
+            _merge_consensus(db, value)
+        return
+
+    for batch in upsert_batches(db, values):
+        statement = insert(Consensus).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Consensus.event_id],
+            set_={
+                column: statement.excluded[column]
+                for column in values[0] if column != "event_id"
+            }
+        )
+        db.execute(statement)
+
+def _merge_consensus(db: Session, value: Dict):
+    existing = db.query(Consensus).filter(Consensus.event_id == value["event_id"]).first()
+    if existing:
+        for column, column_value in value.items():
+            setattr(existing, column, column_value)
+    else:
+        db.add(Consensus(**value))
+
+def update_all_consensus(
+    db: Session,
+    event_ids: Optional[List[int]] = None,
+    rng: Optional[np.random.Generator] = None
+) -> Dict[int, Dict]:
+    """
+    Recompute consensus for many events with one read and one write.
+    Without `event_ids`, covers every unresolved event. Does not commit.
+    """
+    rows = query_latest_forecasts(db, event_ids)
+    results = calculate_consensus_batch(rows, rng=rng)
+    upsert_consensus(db, results)
+    return results
@@ -0,0 +1,134 @@
+import numpy as np
+from typing import Dict, Optional
+
+# Bucket widths accepted by the forecasts API, in seconds
+RESOLUTIONS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "6h": 6 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+def bucket_width_for(window_seconds: float, max_points: int) -> int:
+    """
+    Smallest standard resolution that keeps a window within `max_points` buckets,
+    or an exact width if the window is longer than max_points days.
+    """
+    needed = window_seconds / max(max_points, 1)
+    for width in sorted(RESOLUTIONS.values()):
+        if width >= needed:
+            return width
+    return int(np.ceil(needed))
+
+def bucket_series(timestamps: np.ndarray, values: np.ndarray, width: float) -> Dict[str, np.ndarray]:
+    """
+    Aggregate a time-sorted series into fixed-width time buckets.
+
+    `timestamps` are epoch seconds. Returns arrays of bucket start times and
+    the last, mean, min and max value of each non-empty bucket.
+    """
+    if len(timestamps) == 0:
+        empty = np.array([])
+        return {"t": empty, "last": empty, "mean": empty, "min": empty, "max": empty}
+
+    buckets = np.floor(timestamps / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(values)]
+    counts = ends - starts
+
+    return {
+        "t": buckets[starts] * width,
+        "last": values[ends - 1],
+        "mean": np.add.reduceat(values, starts) / counts,
+        "min": np.minimum.reduceat(values, starts),
+        "max": np.maximum.reduceat(values, starts),
+    }
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of at most `threshold` points that preserve the
+    visual shape of the series, always keeping the first and last point.
+    """
+    n = len(values)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:threshold]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_t = timestamps[next_start:next_end].mean()
+        avg_v = values[next_start:next_end].mean()
+
+        t, v = timestamps[start:end], values[start:end]
+        areas = np.abs(
+            (timestamps[previous] - avg_t) * (v - values[previous]) -
+            (timestamps[previous] - t) * (avg_v - values[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+def downsample(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    width: Optional[float] = None,
+    max_points: Optional[int] = None,
+    method: str = "bucket"
+) -> Dict[str, np.ndarray]:
+    """
+    Downsample one series either by time buckets (with last/mean/min/max) or
+    with LTTB. For buckets, `width` wins over `max_points`; without either the
+    series is returned unchanged. Output always has "t" and "last" keys.
+    """
+    if method == "lttb" and max_points:
+        indices = lttb(timestamps, values, max_points)
+        return {"t": timestamps[indices], "last": values[indices]}
+
+    if width is None and max_points and len(values) > max_points:
+        # A window of N widths can straddle N + 1 aligned buckets
+        width = bucket_width_for(timestamps[-1] - timestamps[0] + 1, max(max_points - 1, 1))
+    if width is None:
+        return {"t": timestamps, "last": values}
+    return bucket_series(timestamps, values, width)
+
+def bucket_aggregates(
+    timestamps: np.ndarray,
+    close: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    sums: np.ndarray,
+    counts: np.ndarray,
+    width: float
+) -> Dict[str, np.ndarray]:
+    """
+    Re-bucket pre-aggregated (OHLC) rows into buckets of `width` seconds.
+    Same output as bucket_series, computed from each row's close, low, high,
+    sum and count instead of raw points. `width` must be a multiple of the
+    rows' own bucket width.
+    """
+    if len(timestamps) == 0:
+        return bucket_series(timestamps, close, width)
+
+    buckets = np.floor(timestamps / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(close)]
+
+    return {
+        "t": buckets[starts] * width,
+        "last": close[ends - 1],
+        "mean": np.add.reduceat(sums, starts) / np.add.reduceat(counts, starts),
+        "min": np.minimum.reduceat(low, starts),
+        "max": np.maximum.reduceat(high, starts),
+    }
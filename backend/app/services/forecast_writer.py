@@ -0,0 +1,188 @@
+import csv
+import io
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from app.database import dialect_insert, upsert_batches
+from app.models import Forecast, LatestForecast
+from app.services.rollups import upsert_rollups
+
+FORECAST_COLUMNS = ["event_id", "source_id", "probability", "timestamp", "raw_data"]
+
+class ForecastWriter:
+    """
+    Buffers forecast rows and writes them with a single bulk statement.
+
+    On PostgreSQL (psycopg2) rows are streamed with COPY; on other databases
+    they are sent as one executemany INSERT. The newest row per (event, source)
+    is also upserted into latest_forecasts, and the rows are merged into the
+    hourly and daily forecast_rollups. The writes run on the session's
+    connection, so they join the session's current transaction and are
+    committed (or rolled back) together with everything else.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rows: List[Dict] = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(
+        self,
+        event_id: int,
+        source_id: int,
+        probability: float,
+        timestamp: Optional[datetime] = None,
+        raw_data: Optional[str] = None
+    ):
+        """Buffer one forecast row"""
+        self.rows.append({
+            "event_id": event_id,
+            "source_id": source_id,
+            "probability": probability,
+            "timestamp": timestamp or datetime.utcnow(),
+            "raw_data": raw_data,
+        })
+
+    def flush(self) -> int:
+        """Write all buffered rows and clear the buffer. Returns the row count."""
+        if not self.rows:
+            return 0
+
+        rows, self.rows = self.rows, []
+        connection = self.db.connection()
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+            self._copy(connection, rows)
+        else:
+            self.db.execute(insert(Forecast), rows)
+        upsert_latest_forecasts(self.db, rows)
+        upsert_rollups(self.db, rows)
+        return len(rows)
+
+    def _copy(self, connection, rows: List[Dict]):
+        """Stream rows into the forecasts table with COPY ... FROM STDIN"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                row["event_id"],
+                row["source_id"],
+                repr(float(row["probability"])),
+                row["timestamp"].isoformat(),
+                row["raw_data"],
+            ])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {Forecast.__tablename__} ({', '.join(FORECAST_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+def find_changed_forecasts(db: Session, rows: List[Dict], epsilon: float = 0.0) -> Set[Tuple[int, int]]:
+    """
+    (event_id, source_id) keys of `rows` whose probability differs from the
+    one in latest_forecasts by more than `epsilon`, or that have no latest
+    forecast yet. Reads latest_forecasts once for all of the rows' events.
+    """
+    if not rows:
+        return set()
+
+    event_ids = {row["event_id"] for row in rows}
+    current = {
+        (event_id, source_id): probability
+        for event_id, source_id, probability in db.query(
+            LatestForecast.event_id,
+            LatestForecast.source_id,
+            LatestForecast.probability
+        ).filter(LatestForecast.event_id.in_(event_ids))
+    }
+
+    changed = set()
+    for row in rows:
+        key = (row["event_id"], row["source_id"])
+        previous = current.get(key)
+        if previous is None or abs(row["probability"] - previous) > epsilon:
+            changed.add(key)
+    return changed
+
+def upsert_latest_forecasts(db: Session, rows: List[Dict]):
+    """
+    Upsert the newest of `rows` per (event, source) into latest_forecasts.
+    An existing row is only replaced by one with an equal or later timestamp.
+    """
+    latest: Dict[tuple, Dict] = {}
+    for row in rows:
+        key = (row["event_id"], row["source_id"])
+        if key not in latest or row["timestamp"] >= latest[key]["timestamp"]:
+            latest[key] = row
+    if not latest:
+        return
+
+    values = [
+        {
+            "event_id": row["event_id"],
+            "source_id": row["source_id"],
+            "probability": row["probability"],
+            "timestamp": row["timestamp"],
+        }
+        for row in latest.values()
+    ]
+
+    upsert = dialect_insert(db)
+    if upsert is None:
+        for value in values:
+            existing = db.get(LatestForecast, (value["event_id"], value["source_id"]))
+            if existing is None:
+                db.add(LatestForecast(**value))
+            elif existing.timestamp is None or value["timestamp"] >= existing.timestamp:
+                existing.probability = value["probability"]
+                existing.timestamp = value["timestamp"]
+        return
+
+    for batch in upsert_batches(db, values):
+        statement = upsert(LatestForecast).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LatestForecast.event_id, LatestForecast.source_id],
+            set_={
+                "probability": statement.excluded.probability,
+                "timestamp": statement.excluded.timestamp,
+            },
+            where=statement.excluded.timestamp >= LatestForecast.timestamp
+        )
+        db.execute(statement)
+
+def rebuild_latest_forecasts(db: Session) -> int:
+    """
+    Rebuild latest_forecasts from the full forecasts history.
+    Used to backfill the table; ingestion keeps it current afterwards.
+    Does not commit. Returns the number of rows written.
+    """
+    ranked = db.query(
+        Forecast.event_id,
+        Forecast.source_id,
+        Forecast.probability,
+        Forecast.timestamp,
+        func.row_number().over(
+            partition_by=(Forecast.event_id, Forecast.source_id),
+            order_by=(Forecast.timestamp.desc(), Forecast.id.desc())
+        ).label("rank")
+    ).subquery()
+
+    rows = db.query(
+        ranked.c.event_id,
+        ranked.c.source_id,
+        ranked.c.probability,
+        ranked.c.timestamp
+    ).filter(ranked.c.rank == 1).all()
+
+    db.query(LatestForecast).delete()
+    if rows:
+        db.execute(insert(LatestForecast), [row._asdict() for row in rows])
+    return len(rows)
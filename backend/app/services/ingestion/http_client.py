@@ -0,0 +1,444 @@
+import asyncio
+import hashlib
+import httpx
+import json
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+import os
+
+# Connection pool sizing, shared by every per-host client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# Optional per-host token bucket: sustained requests per second (0 = off) and
+# burst size. Per-source pacing is set by the scheduler's POLL_RATE_* limits;
+# this is only a safety net for hosts that need one, e.g.
+# HTTP_RATE_LIMITS="www.metaculus.com=2,api.elections.kalshi.com=5"
+HTTP_RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "0"))
+HTTP_RATE_BURST = float(os.getenv("HTTP_RATE_BURST", "20"))
+HTTP_RATE_LIMITS = {
+    host.strip(): float(rate)
+    for host, rate in (
+        item.split("=", 1) for item in os.getenv("HTTP_RATE_LIMITS", "").split(",") if "=" in item
+    )
+}
+
+# Retries of idempotent requests after connection errors, timeouts, 429 and 502-504,
+# with full-jitter exponential backoff (seconds)
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+
+# Circuit breaker: consecutive failures that open a host's circuit, and seconds
+# it stays open (failing fast) before one trial request is let through
+HTTP_BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "60"))
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Validators, body hashes and parsed payloads remembered for conditional GETs
+HTTP_CONDITIONAL_CACHE_SIZE = int(os.getenv("HTTP_CONDITIONAL_CACHE_SIZE", "5000"))
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true"
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# host -> AsyncClient, created lazily and reused for the life of the process
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+# host -> GuardedTransport of the current client
+_transports: Dict[str, "GuardedTransport"] = {}
+
+# host -> counters used to confirm connection reuse
+_stats: Dict[str, Dict[str, int]] = {}
+
+def _host_stats(host: str) -> Dict[str, int]:
+    if host not in _stats:
+        _stats[host] = {
+            "requests": 0,
+            "connections_opened": 0,
+            "tls_handshakes": 0,
+            "retries": 0,
+            "throttled": 0,
+            "failures": 0,
+            "circuit_rejections": 0,
+        }
+    return _stats[host]
+
+def _make_trace(host: str):
+    """Build an httpcore trace callback that counts new connections per host."""
+    async def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            _host_stats(host)["connections_opened"] += 1
+        elif event_name == "connection.start_tls.complete":
+            _host_stats(host)["tls_handshakes"] += 1
+    return trace
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the host's circuit is open"""
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, up to `burst` at once"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> bool:
+        """Take a token, waiting for one if needed. Returns True if it had to wait."""
+        waited = False
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            waited = True
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """
+    Closed: requests flow and consecutive failures are counted.
+    Open (after `threshold` failures): requests fail immediately for `cooldown` seconds.
+    Half-open: one trial request goes through; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (0-based)"""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return min(float(value), HTTP_BACKOFF_MAX) if value is not None else None
+    except ValueError:
+        return None
+
+class GuardedTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a host's transport with its token bucket (if any), circuit breaker
+    and retries, so a slow or failing host only ever delays its own requests.
+    A request counts as failed when it ends, after retries, in a transport
+    error, 429 or a 5xx response. Timeouts count once per attempt, and stop
+    the retries once they open the circuit.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, host: str):
+        self.transport = transport
+        self.host = host
+        rate = HTTP_RATE_LIMITS.get(host, HTTP_RATE_LIMIT)
+        self.bucket = TokenBucket(rate, HTTP_RATE_BURST) if rate > 0 else None
+        self.breaker = CircuitBreaker(HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_COOLDOWN)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = _host_stats(self.host)
+        if not self.breaker.allow():
+            stats["circuit_rejections"] += 1
+            raise CircuitOpenError(f"Circuit open for {self.host}", request=request)
+        try:
+            return await self._send(request, stats)
+        except BaseException:
+            # e.g. cancelled at the cycle deadline: don't leave a half-open trial pending
+            self.breaker.trial_in_flight = False
+            raise
+
+    async def _send(self, request: httpx.Request, stats: Dict[str, int]) -> httpx.Response:
+        retries = HTTP_RETRIES if request.method in IDEMPOTENT_METHODS else 0
+        attempt = 0
+        while True:
+            if self.bucket is not None and await self.bucket.acquire():
+                stats["throttled"] += 1
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TimeoutException:
+                # Each timeout already cost HTTP_TIMEOUT seconds
+                stats["failures"] += 1
+                self.breaker.record_failure()
+                if attempt >= retries or self.breaker.state != "closed":
+                    raise
+                delay = _backoff(attempt)
+            except httpx.TransportError:
+                if attempt >= retries:
+                    stats["failures"] += 1
+                    self.breaker.record_failure()
+                    raise
+                delay = _backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    if response.status_code in RETRY_STATUSES or response.status_code >= 500:
+                        stats["failures"] += 1
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return response
+                delay = _retry_after(response) or _backoff(attempt)
+                await response.aclose()
+            attempt += 1
+            stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for the host of `url`.
+    Each host gets its own connection pool with keep-alive (and HTTP/2 when
+    the h2 package is installed), so repeated calls reuse open connections.
+    Requests go through the host's GuardedTransport (rate limit, circuit
+    breaker, retries).
+    """
+    host = urlsplit(url).netloc or url
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        trace = _make_trace(host)
+
+        async def on_request(request: httpx.Request):
+            _host_stats(host)["requests"] += 1
+            request.extensions["trace"] = trace
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        # Keep the host's breaker state across client re-creation
+        previous = _transports.get(host)
+        guarded = GuardedTransport(transport, host)
+        if previous is not None:
+            guarded.bucket, guarded.breaker = previous.bucket, previous.breaker
+        _transports[host] = guarded
+        client = httpx.AsyncClient(
+            transport=guarded,
+            timeout=HTTP_TIMEOUT,
+            event_hooks={"request": [on_request]},
+        )
+        _clients[host] = client
+    return client
+
+async def close_clients():
+    """Close every pooled client. Call on worker/scheduler/app shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """
+    Per-host request, connection, retry and circuit breaker counters.
+    `pool_hit_rate` is the share of requests served on an already-open connection.
+    """
+    stats = {}
+    for host, counters in _stats.items():
+        requests = counters["requests"]
+        opened = counters["connections_opened"]
+        stats[host] = {
+            **counters,
+            "pool_hit_rate": round(1 - opened / requests, 4) if requests else None,
+            "http2": HTTP2_AVAILABLE,
+            "circuit": _transports[host].breaker.state if host in _transports else None,
+        }
+    return stats
+
+def reset_pool_stats(host: Optional[str] = None):
+    """Reset counters for one host, or for all hosts."""
+    if host is None:
+        _stats.clear()
+    else:
+        _stats.pop(host, None)
+
+class _Validated:
+    """What the last 200 response for a URL looked like"""
+    __slots__ = ("etag", "last_modified", "digest", "size", "parse_seconds", "data")
+
+    def __init__(self, etag, last_modified, digest, size, parse_seconds, data):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.size = size
+        self.parse_seconds = parse_seconds
+        self.data = data
+
+# request key -> last response, least recently used first
+_validated: "OrderedDict[str, _Validated]" = OrderedDict()
+
+# source -> conditional fetch counters
+_fetch_stats: Dict[str, Dict[str, float]] = {}
+
+def _source_stats(source: str) -> Dict[str, float]:
+    if source not in _fetch_stats:
+        _fetch_stats[source] = {
+            "requests": 0,
+            "not_modified": 0,
+            "unchanged_body": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+            "parse_seconds": 0.0,
+            "parse_seconds_saved": 0.0,
+        }
+    return _fetch_stats[source]
+
+async def fetch_json(
+    url: str,
+    params: Optional[Dict] = None,
+    source: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None
+) -> Tuple[Any, bool]:
+    """
+    GET `url` and return (parsed JSON, changed).
+
+    Repeated requests for the same URL and params send If-None-Match /
+    If-Modified-Since from the previous response. A 304, or a 200 whose body
+    hashes the same as last time, returns the previously parsed payload with
+    changed=False and skips json(); that payload is shared with the cache, so
+    callers must not modify it. A 304 with nothing cached to reuse (e.g. validators passed
+    in `headers`) is retried once without validators. Raises for other error
+    statuses.
+    Counters are kept per `source` (default: the host); see get_fetch_stats().
+    """
+    key = url + ("?" + urlencode(sorted(params.items())) if params else "")
+    stats = _source_stats(source or urlsplit(url).netloc)
+    previous = _validated.get(key)
+
+    request_headers = dict(headers or {})
+    if previous is not None:
+        if previous.etag:
+            request_headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            request_headers["If-Modified-Since"] = previous.last_modified
+
+    client = get_client(url)
+    kwargs = {"params": params, "headers": request_headers}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    response = await client.get(url, **kwargs)
+    stats["requests"] += 1
+
+    if response.status_code == 304:
+        if previous is not None:
+            _validated.move_to_end(key)
+            stats["not_modified"] += 1
+            stats["bytes_saved"] += previous.size
+            stats["parse_seconds_saved"] += previous.parse_seconds
+            return previous.data, False
+        kwargs["headers"] = {
+            name: value for name, value in request_headers.items()
+            if name.lower() not in ("if-none-match", "if-modified-since")
+        }
+        response = await client.get(url, **kwargs)
+        stats["requests"] += 1
+        if response.status_code == 304:
+            raise httpx.HTTPStatusError(
+                f"304 Not Modified without validators for url '{response.url}'",
+                request=response.request,
+                response=response
+            )
+    response.raise_for_status()
+
+    body = response.content
+    stats["bytes_downloaded"] += len(body)
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+
+    if previous is not None and previous.digest == digest:
+        # Server ignored the validators but sent the same bytes
+        stats["unchanged_body"] += 1
+        stats["parse_seconds_saved"] += previous.parse_seconds
+        previous.etag = etag or previous.etag
+        previous.last_modified = last_modified or previous.last_modified
+        _validated.move_to_end(key)
+        return previous.data, False
+
+    started = time.perf_counter()
+    data = json.loads(body)
+    parse_seconds = time.perf_counter() - started
+    stats["parse_seconds"] += parse_seconds
+
+    _validated[key] = _Validated(etag, last_modified, digest, len(body), parse_seconds, data)
+    _validated.move_to_end(key)
+    while len(_validated) > HTTP_CONDITIONAL_CACHE_SIZE:
+        _validated.popitem(last=False)
+    return data, True
+
+class Unchanged(float):
+    """
+    A probability read from a payload identical to the previous fetch
+    (see fetch_json). Behaves as a plain float; the ingestion worker skips
+    writing it, since nothing new was published.
+    """
+
+def get_fetch_stats() -> Dict[str, Dict]:
+    """Per-source conditional fetch counters: requests answered 304 or with an unchanged body, bytes and parse time saved"""
+    stats = {}
+    for source, counters in _fetch_stats.items():
+        requests = counters["requests"]
+        unchanged = counters["not_modified"] + counters["unchanged_body"]
+        stats[source] = {
+            **counters,
+            "parse_seconds": round(counters["parse_seconds"], 4),
+            "parse_seconds_saved": round(counters["parse_seconds_saved"], 4),
+            "unchanged_rate": round(unchanged / requests, 4) if requests else None,
+        }
+    return stats
+
+def reset_fetch_stats(source: Optional[str] = None):
+    """Reset conditional fetch counters for one source, or for all sources."""
+    if source is None:
+        _fetch_stats.clear()
+    else:
+        _fetch_stats.pop(source, None)
@@ -1,9 +1,173 @@
+import asyncio
 import httpx
+from app.services.ingestion.http_client import fetch_json, get_client
 from typing import List, Dict, Optional
 from datetime import datetime
 import os
 
-POLYMARKET_API_BASE = "https://clob.polymarket.com"
+POLYMARKET_API_BASE = os.getenv("POLYMARKET_API_BASE", "https://clob.polymarket.com")
+POLYMARKET_DATA_API_BASE = "https://data-api.polymarket.com"
+
+# How long a full market catalog snapshot stays valid (seconds)
+POLYMARKET_CATALOG_TTL = float(os.getenv("POLYMARKET_CATALOG_TTL", "900"))
+# Between full refreshes, how often newly listed markets are picked up (seconds)
+POLYMARKET_CATALOG_INCREMENTAL_INTERVAL = float(os.getenv("POLYMARKET_CATALOG_INCREMENTAL_INTERVAL", "60"))
+# Safety cap on pages pulled per refresh; a capped refresh resumes where it stopped
+POLYMARKET_CATALOG_MAX_PAGES = int(os.getenv("POLYMARKET_CATALOG_MAX_PAGES", "200"))
+# Cursor the CLOB API returns once the last page has been reached
+END_CURSOR = "LTE="
+
+# Token ids per POST /books request, and GET /book concurrency when batching is unavailable
+POLYMARKET_BOOK_BATCH_SIZE = int(os.getenv("POLYMARKET_BOOK_BATCH_SIZE", "50"))
+POLYMARKET_BOOK_CONCURRENCY = int(os.getenv("POLYMARKET_BOOK_CONCURRENCY", "10"))
+_batch_books_supported = True
+
+class MarketCatalog:
+    """
+    Snapshot of the Polymarket market list, indexed by condition_id,
+    market_slug and question_id so each event lookup is a dict hit.
+
+    A full refresh walks every page and replaces the snapshot once it is
+    older than POLYMARKET_CATALOG_TTL. In between, an incremental refresh
+    every POLYMARKET_CATALOG_INCREMENTAL_INTERVAL re-reads from the cursor of
+    the last page seen, which picks up markets listed since the previous pass
+    without re-downloading the whole list.
+    """
+
+    def __init__(self):
+        self.by_condition_id: Dict[str, Dict] = {}
+        self.by_slug: Dict[str, Dict] = {}
+        self.by_question_id: Dict[str, Dict] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.resume_cursor: Optional[str] = None
+        self.incremental_at: Optional[datetime] = None
+        self.last_attempt_at: Optional[datetime] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def __len__(self):
+        return len(self.by_condition_id)
+
+    def is_stale(self) -> bool:
+        if self.refreshed_at is None:
+            return True
+        return (datetime.utcnow() - self.refreshed_at).total_seconds() > POLYMARKET_CATALOG_TTL
+
+    def get(self, market_id: str) -> Optional[Dict]:
+        """Find a market by condition_id, market_slug or question_id"""
+        key = str(market_id)
+        return (self.by_condition_id.get(key) or
+                self.by_slug.get(key) or
+                self.by_question_id.get(key))
+
+    def add(self, markets: List[Dict]):
+        for market in markets:
+            if market.get("condition_id"):
+                self.by_condition_id[str(market["condition_id"])] = market
+            if market.get("market_slug"):
+                self.by_slug[str(market["market_slug"])] = market
+            if market.get("question_id"):
+                self.by_question_id[str(market["question_id"])] = market
+
+    def clear(self):
+        self.by_condition_id.clear()
+        self.by_slug.clear()
+        self.by_question_id.clear()
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _incremental_due(self) -> bool:
+        last = self.incremental_at or self.refreshed_at
+        return last is None or (datetime.utcnow() - last).total_seconds() > POLYMARKET_CATALOG_INCREMENTAL_INTERVAL
+
+    async def ensure_fresh(self):
+        """
+        Full refresh if the snapshot is stale, otherwise an incremental one if
+        POLYMARKET_CATALOG_INCREMENTAL_INTERVAL has passed; a no-op in between,
+        so it is cheap to call on every ingestion tick. Concurrent callers
+        share one refresh, and a failed attempt is not retried for a short back-off.
+        """
+        if not self.is_stale() and not self._incremental_due():
+            return
+        async with self._get_lock():
+            recently_tried = (
+                self.last_attempt_at is not None and
+                (datetime.utcnow() - self.last_attempt_at).total_seconds() < 30
+            )
+            if recently_tried:
+                return
+            if self.is_stale():
+                await self._refresh(full=True)
+            elif self._incremental_due():
+                await self._refresh(full=False)
+
+    async def refresh(self, full: Optional[bool] = None):
+        """
+        Refresh the snapshot. Does a full refresh when the snapshot is stale
+        (or `full=True`), otherwise an incremental one from the last cursor.
+        """
+        async with self._get_lock():
+            await self._refresh(self.is_stale() if full is None else full)
+
+    async def _refresh(self, full: bool):
+        self.last_attempt_at = datetime.utcnow()
+        cursor = None if full or not self.resume_cursor else self.resume_cursor
+
+        markets, resume_cursor = await _fetch_market_pages(cursor)
+        if full:
+            self.clear()
+            self.refreshed_at = datetime.utcnow()
+        self.incremental_at = datetime.utcnow()
+        self.add(markets)
+        if full or resume_cursor:
+            self.resume_cursor = resume_cursor
+        print(f"Polymarket catalog {'full' if full else 'incremental'} refresh: "
+              f"{len(markets)} markets fetched, {len(self)} indexed")
+
+market_catalog = MarketCatalog()
+
+async def _fetch_market_pages(cursor: Optional[str] = None):
+    """
+    Walk the paginated /markets endpoint starting at `cursor`.
+    Returns (markets, cursor to resume from): the last page read, or the
+    first unread one if POLYMARKET_CATALOG_MAX_PAGES cut the walk short.
+    """
+    markets: List[Dict] = []
+    last_cursor = cursor
+    for page in range(POLYMARKET_CATALOG_MAX_PAGES):
+        params = {"active": "true"}
+        if cursor:
+            params["next_cursor"] = cursor
+        data, _ = await fetch_json(f"{POLYMARKET_API_BASE}/markets", params=params, source="polymarket", timeout=30.0)
+        if isinstance(data, list):
+            markets.extend(data)
+            break
+        markets.extend(data.get("data", []))
+        last_cursor = cursor
+        cursor = data.get("next_cursor")
+        if not cursor or cursor == END_CURSOR:
+            break
+        if page == POLYMARKET_CATALOG_MAX_PAGES - 1:
+            print(f"Polymarket catalog refresh stopped at POLYMARKET_CATALOG_MAX_PAGES={POLYMARKET_CATALOG_MAX_PAGES}; "
+                  f"the next incremental refresh continues from there")
+            return markets, cursor
+    return markets, last_cursor
+
+async def refresh_market_catalog(full: Optional[bool] = None):
+    """Refresh the shared market catalog now, e.g. from a script (ingestion uses ensure_market_catalog())"""
+    try:
+        await market_catalog.refresh(full)
+    except Exception as e:
+        print(f"Error refreshing Polymarket market catalog: {e}")
+
+async def ensure_market_catalog():
+    """Bring the shared market catalog up to date if its TTL or incremental interval has passed"""
+    try:
+        await market_catalog.ensure_fresh()
+    except Exception as e:
+        print(f"Error refreshing Polymarket market catalog: {e}")
 
 async def fetch_polymarket_markets(event_ids: Optional[List[str]] = None) -> List[Dict]:
     """
@@ -11,98 +175,183 @@ async def fetch_polymarket_markets(event_ids: Optional[List[str]] = None) -> Lis
     For MVP, we'll use their public market endpoints.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Polymarket GraphQL endpoint
-            url = "https://data-api.polymarket.com/events"
-            
-            response = await client.get(url, timeout=30.0)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Parse markets from response
-            markets = []
-            if isinstance(data, list):
-                for market in data:
-                    if market.get("active"):
-                        markets.append({
-                            "id": market.get("id"),
-                            "title": market.get("question"),
-                            "probability": market.get("probability", 0.5),  # May need to calculate from prices
-                            "timestamp": datetime.utcnow(),
-                            "raw_data": market
-                        })
-            
-            return markets
-            
+        # Polymarket GraphQL endpoint
+        url = f"{POLYMARKET_DATA_API_BASE}/events"
+        
+        data, _ = await fetch_json(url, source="polymarket", timeout=30.0)
+        
+        # Parse markets from response
+        markets = []
+        if isinstance(data, list):
+            for market in data:
+                if market.get("active"):
+                    markets.append({
+                        "id": market.get("id"),
+                        "title": market.get("question"),
+                        "probability": market.get("probability", 0.5),  # May need to calculate from prices
+                        "timestamp": datetime.utcnow(),
+                        "raw_data": market
+                    })
+        
+        return markets
+        
     except Exception as e:
         print(f"Error fetching Polymarket data: {e}")
         return []
 
+def _level_price(level) -> float:
+    """Price of one order book level, given as [price, size] or {"price": ...}"""
+    if isinstance(level, dict):
+        return float(level["price"])
+    return float(level[0])
+
+def top_of_book_mid(book: Dict, allow_one_sided: bool = False) -> Optional[float]:
+    """
+    Mid price from the best bid and ask of an order book.
+    With `allow_one_sided`, a book with only bids or only asks returns that side.
+    """
+    bids = book.get("bids") or []
+    asks = book.get("asks") or []
+    if bids and asks:
+        return (_level_price(bids[0]) + _level_price(asks[0])) / 2
+    if allow_one_sided and bids:
+        return _level_price(bids[0])
+    if allow_one_sided and asks:
+        return _level_price(asks[0])
+    return None
+
+async def _fetch_books_batch(token_ids: List[str]) -> Optional[Dict[str, Dict]]:
+    """
+    Fetch many order books in one POST /books request.
+    Returns None, so callers fall back to GET /book, if the endpoint is not
+    available (which also disables batching for the process) or if it
+    rejected this chunk with a 400 (e.g. one malformed token id).
+    """
+    global _batch_books_supported
+    client = get_client(POLYMARKET_API_BASE)
+    response = await client.post(
+        f"{POLYMARKET_API_BASE}/books",
+        json=[{"token_id": token_id} for token_id in token_ids],
+        timeout=10.0
+    )
+    if response.status_code in (404, 405, 501):
+        _batch_books_supported = False
+        return None
+    if response.status_code == 400:
+        return None
+    response.raise_for_status()
+
+    books = {}
+    for book in response.json():
+        token_id = book.get("asset_id") or book.get("token_id")
+        if token_id is not None:
+            books[str(token_id)] = book
+    return books
+
+async def _fetch_book(token_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    """Fetch a single order book with GET /book"""
+    async with semaphore:
+        try:
+            book, _ = await fetch_json(
+                f"{POLYMARKET_API_BASE}/book", params={"token_id": token_id}, source="polymarket", timeout=10.0
+            )
+            return book
+        except httpx.HTTPStatusError:
+            pass
+        except Exception as e:
+            print(f"Error fetching Polymarket order book for {token_id}: {e}")
+    return None
+
+async def fetch_order_books(token_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch order books for many tokens in one pass.
+
+    Tokens are grouped into POST /books requests of POLYMARKET_BOOK_BATCH_SIZE.
+    If the batch endpoint is unavailable, the remaining tokens are fetched
+    with concurrent GET /book requests over the shared connection pool.
+    """
+    unique_ids = list(dict.fromkeys(str(t) for t in token_ids if t))
+    books: Dict[str, Optional[Dict]] = {token_id: None for token_id in unique_ids}
+    remaining = unique_ids
+
+    if _batch_books_supported:
+        remaining = []
+        for i in range(0, len(unique_ids), POLYMARKET_BOOK_BATCH_SIZE):
+            chunk = unique_ids[i:i + POLYMARKET_BOOK_BATCH_SIZE]
+            batch = None
+            if _batch_books_supported:
+                try:
+                    batch = await _fetch_books_batch(chunk)
+                except Exception as e:
+                    print(f"Error fetching Polymarket order book batch: {e}")
+            if batch is None:
+                remaining.extend(chunk)
+            else:
+                books.update({token_id: batch.get(token_id) for token_id in chunk})
+
+    if remaining:
+        semaphore = asyncio.Semaphore(POLYMARKET_BOOK_CONCURRENCY)
+        results = await asyncio.gather(*[_fetch_book(token_id, semaphore) for token_id in remaining])
+        books.update(zip(remaining, results))
+
+    return books
+
+async def fetch_order_book_mids(token_ids: List[str], allow_one_sided: bool = False) -> Dict[str, Optional[float]]:
+    """Top-of-book mid price for each token id, fetched in one pass"""
+    books = await fetch_order_books(token_ids)
+    return {
+        token_id: top_of_book_mid(book, allow_one_sided) if book else None
+        for token_id, book in books.items()
+    }
+
+def _outcome_probability(market: Dict) -> float:
+    """Fallback probability from the market's outcome prices"""
+    outcomes = market.get("outcomes")
+    if outcomes and len(outcomes) >= 2:
+        yes_price = outcomes[0].get("price", 0.5)
+        no_price = outcomes[1].get("price", 0.5)
+        return yes_price / (yes_price + no_price) if (yes_price + no_price) > 0 else 0.5
+    # Last resort: 0.5 if market found but no price data
+    return 0.5
+
+async def fetch_polymarket_probabilities(market_ids: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Fetch current probabilities for many Polymarket markets at once.
+    Markets are resolved from the catalog snapshot and their order books
+    are fetched in batches. Markets not in the catalog map to None.
+    """
+    try:
+        await market_catalog.ensure_fresh()
+    except Exception as e:
+        print(f"Error refreshing Polymarket market catalog: {e}")
+
+    markets = {market_id: market_catalog.get(market_id) for market_id in market_ids}
+    condition_ids = [m.get("condition_id") for m in markets.values() if m and m.get("condition_id")]
+
+    mids = {}
+    try:
+        mids = await fetch_order_book_mids(condition_ids)
+    except Exception as e:
+        print(f"Error fetching Polymarket order books: {e}")
+
+    probabilities = {}
+    for market_id, market in markets.items():
+        if not market:
+            probabilities[market_id] = None
+            continue
+        mid = mids.get(str(market.get("condition_id")))
+        probabilities[market_id] = mid if mid is not None else _outcome_probability(market)
+    return probabilities
+
 async def fetch_polymarket_probability(market_id: str) -> Optional[float]:
     """
     Fetch current probability for a specific Polymarket market.
     Uses condition_id, market_slug, or question_id to find the market.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Fetch markets list and find the one matching our ID
-            url = f"{POLYMARKET_API_BASE}/markets?active=true&limit=100"
-            response = await client.get(url, timeout=30.0)
-            response.raise_for_status()
-            
-            data = response.json()
-            markets = data.get("data", []) if isinstance(data, dict) else data
-            
-            # Find the market by condition_id, market_slug, or question_id
-            market = None
-            for m in markets:
-                if (m.get("condition_id") == market_id or 
-                    m.get("market_slug") == market_id or 
-                    m.get("question_id") == market_id or
-                    str(m.get("condition_id")) == str(market_id) or
-                    str(m.get("market_slug")) == str(market_id)):
-                    market = m
-                    break
-            
-            if market:
-                # Try to get order book data for probability
-                condition_id = market.get("condition_id")
-                if condition_id:
-                    try:
-                        # Get order book to calculate probability from prices
-                        orderbook_url = f"{POLYMARKET_API_BASE}/book?token_id={condition_id}"
-                        book_resp = await client.get(orderbook_url, timeout=10.0)
-                        if book_resp.status_code == 200:
-                            book_data = book_resp.json()
-                            # Calculate from order book bids/asks
-                            if "bids" in book_data and "asks" in book_data:
-                                bids = book_data["bids"]
-                                asks = book_data["asks"]
-                                if bids and asks:
-                                    # Use mid price
-                                    best_bid = float(bids[0][0]) if bids else 0.5
-                                    best_ask = float(asks[0][0]) if asks else 0.5
-                                    probability = (best_bid + best_ask) / 2
-                                    return probability
-                    except:
-                        pass
-                
-                # Fallback: use market's outcomes if available
-                if "outcomes" in market:
-                    outcomes = market["outcomes"]
-                    if len(outcomes) >= 2:
-                        yes_price = outcomes[0].get("price", 0.5)
-                        no_price = outcomes[1].get("price", 0.5)
-                        probability = yes_price / (yes_price + no_price) if (yes_price + no_price) > 0 else 0.5
-                        return probability
-                
-                # Last resort: return 0.5 if market found but no price data
-                return 0.5
-            
-            return None
-            
+        probabilities = await fetch_polymarket_probabilities([market_id])
+        return probabilities.get(market_id)
+        
     except Exception as e:
         print(f"Error fetching Polymarket probability for {market_id}: {e}")
         return None
-
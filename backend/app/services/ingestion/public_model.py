@@ -1,4 +1,4 @@
-import httpx
+from app.services.ingestion.http_client import get_client
 from typing import List, Dict, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
@@ -14,27 +14,27 @@ async def fetch_economist_forecasts(event_keywords: Optional[List[str]] = None)
         # Note: This is a placeholder - you'd need to adapt to actual Economist pages
         url = "https://www.economist.com/interactive/us-2024-election-forecast"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0, follow_redirects=True)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Parse forecast data from page
-            # This is a template - actual parsing depends on page structure
-            forecasts = []
-            
-            # Example: Find forecast elements (adapt to actual page structure)
-            forecast_elements = soup.find_all(['div', 'span'], class_=lambda x: x and 'forecast' in x.lower())
-            
-            for element in forecast_elements:
-                # Extract probability and event name
-                # This is placeholder logic
-                text = element.get_text()
-                # Parse probability from text (adapt as needed)
-                
-            return forecasts
+        client = get_client(url)
+        response = await client.get(url, timeout=30.0, follow_redirects=True)
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Parse forecast data from page
+        # This is a template - actual parsing depends on page structure
+        forecasts = []
+        
+        # Example: Find forecast elements (adapt to actual page structure)
+        forecast_elements = soup.find_all(['div', 'span'], class_=lambda x: x and 'forecast' in x.lower())
+        
+        for element in forecast_elements:
+            # Extract probability and event name
+            # This is placeholder logic
+            text = element.get_text()
+            # Parse probability from text (adapt as needed)
             
+        return forecasts
+        
     except Exception as e:
         print(f"Error fetching Economist forecasts: {e}")
         return []
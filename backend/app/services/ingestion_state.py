@@ -0,0 +1,99 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.database import engine
+from app.models import IngestionCheckpoint
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: no file lock, cycles are only serialized within a process
+    FCNTL_AVAILABLE = False
+
+# Arbitrary 64-bit key for pg_try_advisory_lock, shared by every ingestion process
+INGEST_LOCK_KEY = int(os.getenv("INGEST_LOCK_KEY", "724113"))
+
+# Without PostgreSQL, processes on this host serialize cycles through this file
+INGEST_LOCK_FILE = os.getenv(
+    "INGEST_LOCK_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".ingest.lock")
+)
+
+CHECKPOINT_NAME = "ingestion"
+
+@contextmanager
+def cycle_lock():
+    """
+    Hold the ingestion lock for the duration of the block. Yields False
+    (without waiting) if another cycle holds it, so overlapping runs skip
+    instead of piling up. PostgreSQL uses a session advisory lock, released
+    when its connection closes even if the process dies; other databases
+    fall back to an flock()ed file.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            acquired = connection.execute(select(func.pg_try_advisory_lock(INGEST_LOCK_KEY))).scalar()
+            # The lock is session-level; don't keep a transaction open for the whole cycle
+            connection.commit()
+            try:
+                yield bool(acquired)
+            finally:
+                if acquired:
+                    connection.execute(select(func.pg_advisory_unlock(INGEST_LOCK_KEY)))
+                    connection.commit()
+        return
+
+    if not FCNTL_AVAILABLE:
+        yield True
+        return
+
+    with open(INGEST_LOCK_FILE, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def start_cycle(db: Session) -> IngestionCheckpoint:
+    """
+    The checkpoint of the cycle to run: the unfinished one if the previous
+    cycle was interrupted (resume after its last_event_id), else a fresh one.
+    Does not commit; the first chunk's commit persists it.
+    """
+    checkpoint = db.get(IngestionCheckpoint, CHECKPOINT_NAME)
+    now = datetime.utcnow()
+    if checkpoint is None:
+        checkpoint = IngestionCheckpoint(name=CHECKPOINT_NAME)
+        db.add(checkpoint)
+    elif checkpoint.completed_at is None and checkpoint.last_event_id is not None:
+        return checkpoint
+
+    checkpoint.started_at = now
+    checkpoint.updated_at = now
+    checkpoint.last_event_id = None
+    checkpoint.events_done = 0
+    checkpoint.completed_at = None
+    return checkpoint
+
+def advance_cycle(checkpoint: IngestionCheckpoint, last_event_id: int, events: int):
+    """Record a chunk as done; commit it together with the chunk's writes"""
+    checkpoint.last_event_id = last_event_id
+    checkpoint.events_done = (checkpoint.events_done or 0) + events
+    checkpoint.updated_at = datetime.utcnow()
+
+def complete_cycle(checkpoint: IngestionCheckpoint):
+    checkpoint.completed_at = datetime.utcnow()
+    checkpoint.updated_at = checkpoint.completed_at
+
+def resume_after(checkpoint: Optional[IngestionCheckpoint]) -> int:
+    """Highest event id already ingested by the current cycle, or 0"""
+    if checkpoint is None or checkpoint.completed_at is not None:
+        return 0
+    return checkpoint.last_event_id or 0
@@ -0,0 +1,190 @@
+import os
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+from app.models import Forecast
+
+# Monthly partitions created ahead of the current month
+FORECAST_PARTITIONS_AHEAD = int(os.getenv("FORECAST_PARTITIONS_AHEAD", "3"))
+
+TABLE = Forecast.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+def _month_start(value) -> date:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_{month:%Y_%m}"
+
+def is_postgresql(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+def is_partitioned(connection: Connection) -> bool:
+    """True if the forecasts table is a native PostgreSQL partitioned table"""
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": TABLE}).scalar()
+
+def list_partitions(connection: Connection) -> List[str]:
+    return connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table ORDER BY child.relname"
+    ), {"table": TABLE}).scalars().all()
+
+def create_month_partition(connection: Connection, month: date):
+    """Create the partition holding [month, next month), if it doesn't exist"""
+    start, end = month, _add_months(month, 1)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+    ))
+
+def split_month_from_default(connection: Connection, month: date):
+    """
+    Create a missing month partition even when rows for that month already
+    sit in the default partition (PostgreSQL refuses to create it otherwise):
+    move those rows aside, create the partition and re-insert them through
+    the parent so they land in it.
+    """
+    name = partition_name(month)
+    if connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar():
+        return
+    start, end = month, _add_months(month, 1)
+    holding = f"{name}_moving"
+    connection.execute(text(f"CREATE TEMP TABLE {holding} (LIKE {DEFAULT_PARTITION}) ON COMMIT DROP"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE timestamp >= '{start:%Y-%m-%d} 00:00:00+00' AND timestamp < '{end:%Y-%m-%d} 00:00:00+00' "
+        f"RETURNING *) INSERT INTO {holding} SELECT * FROM moved"
+    ))
+    create_month_partition(connection, month)
+    connection.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {holding}"))
+
+def ensure_future_partitions(engine: Engine, months_ahead: int = None) -> List[str]:
+    """
+    Make sure partitions exist from the current month through `months_ahead`
+    months ahead, so new rows never land in the default partition.
+    Each month is created in its own transaction, so one failure doesn't
+    hold back the others. No-op unless the forecasts table is partitioned.
+    Returns the partitions that exist afterwards.
+    """
+    if not is_postgresql(engine):
+        return []
+    months_ahead = FORECAST_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            return []
+
+    current = _month_start(datetime.utcnow())
+    ensured = []
+    for month in (_add_months(current, i) for i in range(months_ahead + 1)):
+        try:
+            with engine.begin() as connection:
+                split_month_from_default(connection, month)
+            ensured.append(partition_name(month))
+        except Exception as e:
+            print(f"Error creating forecast partition {partition_name(month)}: {e}")
+    return ensured
+
+def migrate_forecasts_to_partitioned(engine: Engine) -> int:
+    """
+    Convert a plain forecasts table into one range-partitioned by month on
+    `timestamp`, in a single transaction:
+
+    1. rename the existing table out of the way
+    2. create the partitioned table (primary key becomes (id, timestamp), as
+       PostgreSQL requires the partition key in unique constraints) with one
+       partition per month of existing data, future months and a default
+    3. copy the rows, keeping ids, and hand the id sequence to the new table
+    4. drop the old table and build the indexes on the partitioned table
+       (PostgreSQL propagates them to every partition)
+
+    Returns the number of rows moved, or -1 if the table is already partitioned.
+    """
+    if not is_postgresql(engine):
+        raise RuntimeError("Forecast partitioning requires PostgreSQL")
+
+    legacy = f"{TABLE}_unpartitioned"
+    with engine.begin() as connection:
+        if is_partitioned(connection):
+            return -1
+
+        bounds = connection.execute(text(f"SELECT min(timestamp), max(timestamp) FROM {TABLE}")).one()
+        sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": TABLE}).scalar()
+
+        # Index and primary key names are schema-wide; free them for the new table
+        connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {legacy}"))
+        primary_key = connection.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+        ), {"table": legacy}).scalar()
+        if primary_key:
+            connection.execute(text(f'ALTER TABLE {legacy} DROP CONSTRAINT "{primary_key}"'))
+        for index in Forecast.__table__.indexes:
+            connection.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+        connection.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                id INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+                event_id INTEGER REFERENCES events (id),
+                source_id INTEGER REFERENCES sources (id),
+                probability DOUBLE PRECISION,
+                timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                raw_data TEXT,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """))
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        current = _month_start(datetime.utcnow())
+        month = _month_start(bounds[0]) if bounds[0] is not None else current
+        last = _add_months(max(current, _month_start(bounds[1]) if bounds[1] is not None else current), FORECAST_PARTITIONS_AHEAD)
+        while month <= last:
+            create_month_partition(connection, month)
+            month = _add_months(month, 1)
+
+        moved = connection.execute(text(
+            f"INSERT INTO {TABLE} (id, event_id, source_id, probability, timestamp, raw_data) "
+            f"SELECT id, event_id, source_id, probability, coalesce(timestamp, now()), raw_data FROM {legacy}"
+        )).rowcount
+
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id"))
+        connection.execute(text(f"DROP TABLE {legacy}"))
+        for index in Forecast.__table__.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+    return moved
+
+def ensure_forecast_partitions(engine: Engine) -> Optional[str]:
+    """
+    Setup hook after create_all(), run by scripts/init_db.py rather than on
+    API startup so it never races a running scheduler. On PostgreSQL an empty,
+    unpartitioned forecasts table (e.g. freshly created) is converted on the
+    spot; a populated one is left for scripts/partition_forecasts.py. Then
+    future partitions are topped up. Returns a status message, or None on
+    other databases.
+    """
+    if not is_postgresql(engine):
+        return None
+
+    with engine.connect() as connection:
+        partitioned = is_partitioned(connection)
+        empty = partitioned or connection.execute(text(f"SELECT NOT EXISTS (SELECT 1 FROM {TABLE})")).scalar()
+
+    if not partitioned:
+        if not empty:
+            return "forecasts table is not partitioned; run scripts/partition_forecasts.py to migrate it"
+        migrate_forecasts_to_partitioned(engine)
+
+    ensure_future_partitions(engine)
+    return "forecasts table is partitioned by month"
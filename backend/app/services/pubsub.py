@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models import Consensus, Event, Forecast, LatestForecast, Source
+from app.services import cache
+
+# Messages buffered per subscriber before the oldest are dropped
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "1000"))
+
+# Without Redis, how often the web process checks for a finished ingest (seconds)
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "0.5"))
+
+CHANNEL = "forecast-updates"
+
+CONSENSUS_FIELDS = (
+    "probability",
+    "disagreement",
+    "disagreement_label",
+    "confidence_interval_lower",
+    "confidence_interval_upper",
+)
+
+class Broker:
+    """
+    In-process pub/sub for stream updates. Subscribers get their own bounded
+    asyncio queue; publish() is thread-safe and never blocks on slow clients
+    (a full queue drops its oldest message). Consensus messages are only
+    forwarded when the values differ from the last ones published.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.last_consensus: Dict[int, tuple] = {}
+        self.lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (queue, asyncio.get_running_loop())
+        with self.lock:
+            self.subscribers.add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self.lock:
+                self.subscribers.discard(subscriber)
+
+    def publish(self, messages: Iterable[Dict]) -> int:
+        """Fan messages out to every subscriber. Returns how many were forwarded."""
+        changed = []
+        with self.lock:
+            for message in messages:
+                if message["type"] == "consensus":
+                    values = tuple(message.get(field) for field in CONSENSUS_FIELDS)
+                    if self.last_consensus.get(message["event_id"]) == values:
+                        continue
+                    self.last_consensus[message["event_id"]] = values
+                changed.append(message)
+            subscribers = list(self.subscribers)
+
+        if changed:
+            for queue, loop in subscribers:
+                loop.call_soon_threadsafe(_offer, queue, changed)
+        return len(changed)
+
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return len(self.subscribers)
+
+def _offer(queue: asyncio.Queue, messages: List[Dict]):
+    for message in messages:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+broker = Broker()
+
+def consensus_message(event_id: int, values: Dict, timestamp: Optional[datetime] = None) -> Dict:
+    message = {"type": "consensus", "event_id": event_id}
+    message.update({field: values[field] for field in CONSENSUS_FIELDS})
+    if "source_count" in values:
+        message["source_count"] = values["source_count"]
+    timestamp = timestamp or values.get("timestamp")
+    message["timestamp"] = timestamp.isoformat() if timestamp else None
+    return message
+
+def forecast_messages(points: Iterable[tuple]) -> List[Dict]:
+    """One message per event from (event_id, source_name, probability, timestamp) points"""
+    grouped: Dict[int, List[Dict]] = {}
+    for event_id, source_name, probability, timestamp in points:
+        grouped.setdefault(event_id, []).append({
+            "timestamp": timestamp.isoformat(),
+            "probability": probability,
+            "source_name": source_name,
+        })
+    return [{"type": "forecasts", "event_id": event_id, "points": points} for event_id, points in grouped.items()]
+
+def publish_cycle(forecast_rows: List[Dict], consensus_results: Dict[int, Dict], source_names: Dict[int, str]):
+    """
+    Announce an ingestion cycle: the forecast points it appended and the
+    consensus it computed. Delivered to streams in this process directly and,
+    when REDIS_URL is set, to every web process through Redis.
+    """
+    messages = forecast_messages(
+        (row["event_id"], source_names.get(row["source_id"], "Unknown"), row["probability"], row["timestamp"])
+        for row in forecast_rows
+    )
+    messages += [consensus_message(event_id, values) for event_id, values in consensus_results.items()]
+    if _bridge is None:
+        # A running bridge picks the cycle up itself; avoid sending it twice
+        broker.publish(messages)
+
+    client = cache._get_redis()
+    if client is not None:
+        try:
+            client.publish(CHANNEL, json.dumps(messages))
+        except cache.redis.RedisError as e:
+            print(f"Could not publish stream updates to Redis: {e}")
+
+class _DatabaseWatcher:
+    """
+    Fallback bridge without Redis: waits for the cache version to change
+    (the worker bumps it after each commit), then reads forecasts appended
+    since the last check and current consensus, and publishes what differs
+    from what it last sent per event, like the worker does through Redis:
+    points whose probability moved and consensus whose values changed.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.last_forecast_id = None
+        self.sent_probability: Dict[tuple, float] = {}
+        self.sent_consensus: Dict[int, tuple] = {}
+
+    def poll(self):
+        version = cache.get_version()
+        if version == self.version:
+            return
+        db = SessionLocal()
+        try:
+            if self.version is None:
+                # First run: remember the current state so only later changes go out
+                self.last_forecast_id = db.query(func.max(Forecast.id)).scalar() or 0
+                self.sent_probability = {
+                    (event_id, source_name): probability
+                    for event_id, source_name, probability in db.query(
+                        LatestForecast.event_id,
+                        func.coalesce(Source.display_name, "Unknown"),
+                        LatestForecast.probability
+                    ).outerjoin(Source, Source.id == LatestForecast.source_id)
+                }
+                self.sent_consensus = {event_id: tuple(values) for event_id, *values, _ in self._consensus(db)}
+                self.version = version
+                return
+
+            points = db.query(
+                Forecast.id,
+                Forecast.event_id,
+                func.coalesce(Source.display_name, "Unknown"),
+                Forecast.probability,
+                Forecast.timestamp
+            ).outerjoin(Source, Source.id == Forecast.source_id).filter(
+                Forecast.id > self.last_forecast_id
+            ).order_by(Forecast.id).all()
+            if points:
+                self.last_forecast_id = points[-1][0]
+
+            moved = []
+            for _, event_id, source_name, probability, timestamp in points:
+                if self.sent_probability.get((event_id, source_name)) != probability:
+                    self.sent_probability[(event_id, source_name)] = probability
+                    moved.append((event_id, source_name, probability, timestamp))
+            messages = forecast_messages(moved)
+            for event_id, *values, updated_at in self._consensus(db):
+                if self.sent_consensus.get(event_id) != tuple(values):
+                    self.sent_consensus[event_id] = tuple(values)
+                    messages.append(consensus_message(event_id, dict(zip(CONSENSUS_FIELDS, values)), updated_at))
+            self.version = version
+            broker.publish(messages)
+        finally:
+            db.close()
+
+    def _consensus(self, db):
+        return db.query(
+            Consensus.event_id,
+            *(getattr(Consensus, field) for field in CONSENSUS_FIELDS),
+            func.coalesce(Consensus.updated_at, Consensus.timestamp)
+        ).join(Event, Event.id == Consensus.event_id).filter(Event.resolved == False).all()
+
+async def _watch_database():
+    watcher = _DatabaseWatcher()
+    while True:
+        try:
+            await asyncio.to_thread(watcher.poll)
+        except Exception as e:
+            print(f"Stream watcher error: {e}")
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+async def _listen_redis():
+    import redis.asyncio as aioredis
+
+    while True:
+        client = aioredis.Redis.from_url(cache.REDIS_URL)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        broker.publish(json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Stream Redis listener error: {e}, reconnecting")
+            await asyncio.sleep(1)
+        finally:
+            await client.close()
+
+_bridge: Optional[asyncio.Task] = None
+
+def start_bridge():
+    """Start forwarding updates from the ingestion worker process into the broker"""
+    global _bridge
+    if _bridge is None:
+        listener = _listen_redis if cache._get_redis() is not None else _watch_database
+        _bridge = asyncio.get_running_loop().create_task(listener())
+
+async def stop_bridge():
+    global _bridge
+    if _bridge is not None:
+        _bridge.cancel()
+        try:
+            await _bridge
+        except asyncio.CancelledError:
+            pass
+        _bridge = None
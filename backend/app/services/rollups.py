@@ -0,0 +1,199 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.database import dialect_insert, upsert_batches
+from app.models import Forecast, ForecastRollup, Source
+
+# Rollup resolutions kept in forecast_rollups, in seconds
+ROLLUP_RESOLUTIONS = {
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the rollup bucket that contains `timestamp`"""
+    if resolution == "1h":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def choose_rollup(width_seconds: float) -> Optional[str]:
+    """
+    Coarsest rollup whose buckets evenly divide `width_seconds`,
+    or None if the query needs finer data than any rollup holds.
+    """
+    for resolution, seconds in sorted(ROLLUP_RESOLUTIONS.items(), key=lambda item: -item[1]):
+        if width_seconds >= seconds and width_seconds % seconds == 0:
+            return resolution
+    return None
+
+def aggregate_rows(rows: List[Dict]) -> List[Dict]:
+    """
+    Fold forecast rows (event_id, source_id, probability, timestamp) into
+    one OHLC aggregate per (event, source, resolution, bucket).
+    """
+    aggregates: Dict[Tuple, Dict] = {}
+    for row in rows:
+        probability, timestamp = row["probability"], row["timestamp"]
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (row["event_id"], row["source_id"], resolution, bucket_start(timestamp, resolution))
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregates[key] = {
+                    "event_id": key[0],
+                    "source_id": key[1],
+                    "resolution": resolution,
+                    "bucket_start": key[3],
+                    "open": probability,
+                    "high": probability,
+                    "low": probability,
+                    "close": probability,
+                    "sum": probability,
+                    "count": 1,
+                    "open_timestamp": timestamp,
+                    "close_timestamp": timestamp,
+                }
+                continue
+            aggregate["high"] = max(aggregate["high"], probability)
+            aggregate["low"] = min(aggregate["low"], probability)
+            aggregate["sum"] += probability
+            aggregate["count"] += 1
+            if timestamp < aggregate["open_timestamp"]:
+                aggregate["open"], aggregate["open_timestamp"] = probability, timestamp
+            if timestamp >= aggregate["close_timestamp"]:
+                aggregate["close"], aggregate["close_timestamp"] = probability, timestamp
+    return list(aggregates.values())
+
+def upsert_rollups(db: Session, rows: List[Dict]):
+    """
+    Merge forecast rows into the hourly and daily rollups, one statement per batch.
+    Existing buckets are extended: high/low widen, sum/count accumulate, and
+    open/close move only if the new rows are earlier/later. Does not commit.
+    """
+    values = aggregate_rows(rows)
+    if not values:
+        return
+
+    upsert = dialect_insert(db)
+    if upsert is None:
+        for value in values:
+            _merge_rollup(db, value)
+        return
+
+    # Two-argument scalar max/min: GREATEST/LEAST on PostgreSQL, max/min on SQLite
+    greatest, least = (func.greatest, func.least) if db.get_bind().dialect.name == "postgresql" else (func.max, func.min)
+
+    for batch in upsert_batches(db, values):
+        statement = upsert(ForecastRollup).values(batch)
+        new = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                ForecastRollup.event_id,
+                ForecastRollup.source_id,
+                ForecastRollup.resolution,
+                ForecastRollup.bucket_start,
+            ],
+            set_={
+                "high": greatest(ForecastRollup.high, new.high),
+                "low": least(ForecastRollup.low, new.low),
+                "sum": ForecastRollup.sum + new.sum,
+                "count": ForecastRollup.count + new.count,
+                "open": case((new.open_timestamp < ForecastRollup.open_timestamp, new.open), else_=ForecastRollup.open),
+                "open_timestamp": least(ForecastRollup.open_timestamp, new.open_timestamp),
+                "close": case((new.close_timestamp >= ForecastRollup.close_timestamp, new.close), else_=ForecastRollup.close),
+                "close_timestamp": greatest(ForecastRollup.close_timestamp, new.close_timestamp),
+            }
+        )
+        db.execute(statement)
+
+def _merge_rollup(db: Session, value: Dict):
+    """Per-row merge for databases without a native upsert"""
+    key = (value["event_id"], value["source_id"], value["resolution"], value["bucket_start"])
+    existing = db.get(ForecastRollup, key)
+    if existing is None:
+        db.add(ForecastRollup(**value))
+        return
+    existing.high = max(existing.high, value["high"])
+    existing.low = min(existing.low, value["low"])
+    existing.sum += value["sum"]
+    existing.count += value["count"]
+    if value["open_timestamp"] < existing.open_timestamp:
+        existing.open, existing.open_timestamp = value["open"], value["open_timestamp"]
+    if value["close_timestamp"] >= existing.close_timestamp:
+        existing.close, existing.close_timestamp = value["close"], value["close_timestamp"]
+
+def raw_history_start(db: Session) -> Optional[datetime]:
+    """
+    Start of the first day still held as raw forecasts (naive UTC), or None.
+    Rollups before it are the only record of archived days.
+    """
+    oldest = db.query(func.min(Forecast.timestamp)).scalar()
+    if oldest is None:
+        return None
+    if oldest.tzinfo is not None:
+        oldest = oldest.astimezone(timezone.utc).replace(tzinfo=None)
+    return bucket_start(oldest, "1d")
+
+def backfill_rollups(db: Session, since: Optional[datetime] = None, batch_size: int = 50000) -> int:
+    """
+    Rebuild rollups from raw forecasts, for all raw history or from `since`.
+    Buckets in the covered range are deleted first, so the job can be re-run.
+    The range never reaches back before the oldest raw forecast, so buckets
+    of days already archived to Parquet are kept.
+    Streams forecasts in batches and commits once at the end.
+    Returns the number of forecasts rolled up.
+    """
+    history_start = raw_history_start(db)
+    if history_start is None:
+        return 0
+    if since is not None:
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        history_start = max(history_start, bucket_start(since, "1d"))
+    since = history_start
+
+    db.query(ForecastRollup).filter(ForecastRollup.bucket_start >= since).delete(synchronize_session=False)
+
+    query = db.query(
+        Forecast.event_id,
+        Forecast.source_id,
+        Forecast.probability,
+        Forecast.timestamp
+    ).filter(Forecast.timestamp >= since)
+
+    total = 0
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row._asdict())
+        if len(batch) >= batch_size:
+            upsert_rollups(db, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        upsert_rollups(db, batch)
+        total += len(batch)
+    db.commit()
+    return total
+
+def rollup_series_query(event_id: int, since: datetime, resolution: str):
+    """
+    Select rollup buckets for an event from `since`, oldest first, as rows of
+    (bucket_start, source_name, close, high, low, sum, count).
+    """
+    return select(
+        ForecastRollup.bucket_start,
+        func.coalesce(Source.display_name, "Unknown"),
+        ForecastRollup.close,
+        ForecastRollup.high,
+        ForecastRollup.low,
+        ForecastRollup.sum,
+        ForecastRollup.count
+    ).outerjoin(Source, Source.id == ForecastRollup.source_id).filter(
+        ForecastRollup.event_id == event_id,
+        ForecastRollup.resolution == resolution,
+        ForecastRollup.bucket_start >= bucket_start(since, resolution)
+    ).order_by(ForecastRollup.bucket_start.asc())
+
+def query_rollup_series(db: Session, event_id: int, since: datetime, resolution: str):
+    """Rows of rollup_series_query() for a sync session"""
+    return db.execute(rollup_series_query(event_id, since, resolution)).all()
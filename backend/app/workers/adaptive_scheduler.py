@@ -0,0 +1,204 @@
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models import Event, ForecastRollup, Source
+from app.workers.ingestion_worker import SOURCE_FETCHERS, ingest_forecasts
+
+# Bounds on how often one (event, source) is polled (seconds)
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "60"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "900"))
+
+# Typical move per poll (probability points) that halves the polling interval
+POLL_VOLATILITY_SCALE = float(os.getenv("POLL_VOLATILITY_SCALE", "0.01"))
+# Weight of the newest observed move in the volatility average
+POLL_VOLATILITY_ALPHA = float(os.getenv("POLL_VOLATILITY_ALPHA", "0.3"))
+
+# Within this many hours of resolution_date, intervals shrink toward POLL_MIN_INTERVAL
+POLL_RESOLUTION_WINDOW_HOURS = float(os.getenv("POLL_RESOLUTION_WINDOW_HOURS", "48"))
+
+# How often the queue is checked for due polls, and the event list re-read (seconds)
+POLL_TICK = float(os.getenv("POLL_TICK", "5"))
+POLL_EVENTS_REFRESH = float(os.getenv("POLL_EVENTS_REFRESH", "300"))
+
+# Requests per minute each source may receive from the scheduler
+SOURCE_RATE_LIMITS = {
+    "polymarket": float(os.getenv("POLL_RATE_POLYMARKET", "300")),
+    "kalshi": float(os.getenv("POLL_RATE_KALSHI", "100")),
+    "metaculus": float(os.getenv("POLL_RATE_METACULUS", "30")),
+    "public_model": float(os.getenv("POLL_RATE_PUBLIC_MODEL", "10")),
+}
+
+Key = Tuple[int, str]
+
+def poll_interval(
+    volatility: float,
+    seconds_to_resolution: Optional[float] = None,
+    min_interval: float = POLL_MIN_INTERVAL,
+    max_interval: float = POLL_MAX_INTERVAL
+) -> float:
+    """
+    Seconds until the next poll of one (event, source).
+
+    Starts from `max_interval`, divided by (1 + volatility / POLL_VOLATILITY_SCALE)
+    so moving markets are polled more often, then scaled by the remaining
+    share of the resolution window for events about to resolve.
+    """
+    interval = max_interval / (1 + max(volatility, 0.0) / POLL_VOLATILITY_SCALE)
+    window = POLL_RESOLUTION_WINDOW_HOURS * 3600
+    if seconds_to_resolution is not None and window > 0 and seconds_to_resolution < window:
+        interval *= max(seconds_to_resolution, 0.0) / window
+    return min(max(interval, min_interval), max_interval)
+
+class AdaptiveScheduler:
+    """
+    Polls each (event, source) on its own timetable instead of re-ingesting
+    everything on a fixed interval.
+
+    Next-poll times live in a heap. Each tick pops every due pair, spaces
+    them per source so no source receives more than its SOURCE_RATE_LIMITS
+    per minute (the rest wait for a later slot), and runs one ingestion for
+    the batch. After a poll, the pair's volatility (an exponentially weighted
+    average of absolute probability moves, seeded from the hourly rollups) and
+    its event's time to resolution set when it is polled next.
+    """
+
+    def __init__(self):
+        self.queue: List[Tuple[float, int, Key]] = []
+        self.scheduled: Dict[Key, float] = {}
+        self.volatility: Dict[Key, float] = {}
+        self.last_probability: Dict[Key, float] = {}
+        self.resolution_dates: Dict[int, Optional[datetime]] = {}
+        self.source_next_slot: Dict[str, float] = {}
+        self.reserved: Set[Key] = set()
+        self.counter = 0
+        self.events_loaded_at: Optional[float] = None
+        self.stats = {"polls": 0, "rate_limited": 0, "cycles": 0}
+
+    def _push(self, key: Key, when: float):
+        self.counter += 1
+        self.scheduled[key] = when
+        heapq.heappush(self.queue, (when, self.counter, key))
+
+    def load_events(self, now: float):
+        """Sync the queue with unresolved events: add new pairs (due now), drop resolved ones"""
+        db = SessionLocal()
+        try:
+            sources = {name for (name,) in db.query(Source.name).filter(Source.is_active == True)}
+            events = db.query(Event).filter(Event.resolved == False).all()
+            keys = set()
+            self.resolution_dates = {}
+            for event in events:
+                self.resolution_dates[event.id] = _as_utc(event.resolution_date)
+                for source_name, (id_attr, _) in SOURCE_FETCHERS.items():
+                    if source_name in sources and getattr(event, id_attr):
+                        keys.add((event.id, source_name))
+
+            if self.events_loaded_at is None:
+                self.volatility.update(_recent_volatility(db))
+            for key in keys - self.scheduled.keys():
+                self._push(key, now)
+            for key in self.scheduled.keys() - keys:
+                # Stale heap entries are skipped when popped
+                del self.scheduled[key]
+                self.reserved.discard(key)
+        finally:
+            db.close()
+        self.events_loaded_at = now
+
+    def pop_due(self, now: float) -> List[Key]:
+        """Pairs due at `now` that their source's rate limit admits; others are pushed back"""
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            when, _, key = heapq.heappop(self.queue)
+            if self.scheduled.get(key) != when:
+                continue
+            source_name = key[1]
+            rate = SOURCE_RATE_LIMITS.get(source_name)
+            if rate and key not in self.reserved:
+                # Take the source's next free slot; if it is in the future, wait for it
+                slot = max(self.source_next_slot.get(source_name, now), now)
+                self.source_next_slot[source_name] = slot + 60.0 / rate
+                if slot > now:
+                    self.stats["rate_limited"] += 1
+                    self.reserved.add(key)
+                    self._push(key, slot)
+                    continue
+            self.reserved.discard(key)
+            del self.scheduled[key]
+            due.append(key)
+        return due
+
+    def record(self, key: Key, probability: Optional[float], now: float):
+        """Update the pair's volatility from a poll result and queue its next poll"""
+        if probability is not None:
+            previous = self.last_probability.get(key)
+            if previous is not None:
+                move = abs(probability - previous)
+                self.volatility[key] = (
+                    POLL_VOLATILITY_ALPHA * move +
+                    (1 - POLL_VOLATILITY_ALPHA) * self.volatility.get(key, move)
+                )
+            self.last_probability[key] = probability
+
+        resolution_date = self.resolution_dates.get(key[0])
+        seconds_to_resolution = None
+        if resolution_date is not None:
+            seconds_to_resolution = (resolution_date - datetime.now(timezone.utc)).total_seconds()
+        interval = poll_interval(self.volatility.get(key, 0.0), seconds_to_resolution)
+        self._push(key, now + interval)
+
+    async def run_once(self, loop_time) -> int:
+        """Poll everything that is due. Returns the number of pairs polled."""
+        now = loop_time()
+        if self.events_loaded_at is None or now - self.events_loaded_at >= POLL_EVENTS_REFRESH:
+            self.load_events(now)
+
+        due = self.pop_due(now)
+        if not due:
+            return 0
+
+        results = {}
+        try:
+            results = await ingest_forecasts(set(due)) or {}
+        except Exception as e:
+            print(f"Error in adaptive ingestion: {e}")
+        finished = loop_time()
+        for key in due:
+            # Pairs whose event has since resolved are dropped on the next load_events()
+            self.record(key, results.get(key), finished)
+        self.stats["polls"] += len(due)
+        self.stats["cycles"] += 1
+        return len(due)
+
+    async def run(self):
+        """Poll forever, checking the queue every POLL_TICK seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            polled = await self.run_once(loop.time)
+            if polled:
+                print(f"Adaptive scheduler polled {polled} pairs; {len(self.scheduled)} queued, stats {self.stats}")
+            await asyncio.sleep(POLL_TICK)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _recent_volatility(db, hours: int = 24) -> Dict[Key, float]:
+    """Average hourly high-low range per (event, source) over the last `hours`, from the rollups"""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    rows = db.query(
+        ForecastRollup.event_id,
+        Source.name,
+        func.avg(ForecastRollup.high - ForecastRollup.low)
+    ).join(Source, Source.id == ForecastRollup.source_id).filter(
+        ForecastRollup.resolution == "1h",
+        ForecastRollup.bucket_start >= since
+    ).group_by(ForecastRollup.event_id, Source.name).all()
+    return {(event_id, source_name): float(volatility or 0.0) for event_id, source_name, volatility in rows}
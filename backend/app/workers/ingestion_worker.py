@@ -1,58 +1,258 @@
 import asyncio
+import os
 from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.models import Event, Forecast, Source
+from app.models import Event, Source
 from app.services.ingestion import polymarket, kalshi, metaculus, public_model
-from app.services.consensus_calculator import update_consensus
+from app.services.ingestion.http_client import Unchanged, close_clients, get_fetch_stats, get_pool_stats
+from app.services.consensus_calculator import update_all_consensus
+from app.services.forecast_writer import ForecastWriter, find_changed_forecasts
+from app.services.cache import bump_version
+from app.services.pubsub import publish_cycle
+from app.services.ingestion_state import advance_cycle, complete_cycle, cycle_lock, resume_after, start_cycle
 
-async def ingest_forecasts():
+# Overall wall-clock budget for one ingestion cycle (seconds)
+INGEST_CYCLE_DEADLINE = float(os.getenv("INGEST_CYCLE_DEADLINE", "600"))
+
+# Events written and committed per transaction (fetching spans the whole cycle)
+INGEST_COMMIT_EVERY = int(os.getenv("INGEST_COMMIT_EVERY", "100"))
+
+# A fetched probability within this distance of the stored latest one counts as unchanged
+INGEST_CHANGE_EPSILON = float(os.getenv("INGEST_CHANGE_EPSILON", "0"))
+
+# Don't append forecast rows for unchanged probabilities (keeps only the changes)
+INGEST_SKIP_UNCHANGED = os.getenv("INGEST_SKIP_UNCHANGED", "false").lower() in ("1", "true", "yes")
+
+# Default number of in-flight requests allowed per source
+INGEST_DEFAULT_CONCURRENCY = int(os.getenv("INGEST_DEFAULT_CONCURRENCY", "8"))
+
+# Per-source overrides, e.g. INGEST_CONCURRENCY_POLYMARKET=16
+SOURCE_CONCURRENCY = {
+    "polymarket": int(os.getenv("INGEST_CONCURRENCY_POLYMARKET", INGEST_DEFAULT_CONCURRENCY)),
+    "kalshi": int(os.getenv("INGEST_CONCURRENCY_KALSHI", INGEST_DEFAULT_CONCURRENCY)),
+    "metaculus": int(os.getenv("INGEST_CONCURRENCY_METACULUS", "4")),
+    "public_model": int(os.getenv("INGEST_CONCURRENCY_PUBLIC_MODEL", "2")),
+}
+
+# source name -> (Event attribute holding the source-specific id, fetcher)
+SOURCE_FETCHERS: Dict[str, Tuple[str, Callable[[str], Awaitable[Optional[float]]]]] = {
+    "polymarket": ("polymarket_id", polymarket.fetch_polymarket_probability),
+    "kalshi": ("kalshi_id", kalshi.fetch_kalshi_probability),
+    "metaculus": ("metaculus_id", lambda qid: metaculus.fetch_metaculus_probability(int(qid))),
+    "public_model": ("public_model_id", public_model.fetch_public_model_probability),
+}
+
+# Sources that can fetch many ids in one pass: source name -> batch fetcher
+BATCH_FETCHERS: Dict[str, Callable[[List[str]], Awaitable[Dict[str, Optional[float]]]]] = {
+    "polymarket": polymarket.fetch_polymarket_probabilities,
+}
+
+def build_fetch_jobs(events: List[Event], source_map: Dict[str, Source]) -> List[Tuple[int, str, str]]:
+    """
+    Build the list of (event_id, source_name, external_id) fetches for a cycle.
+    Jobs are ordered by event, then by source, so results can be collected
+    deterministically regardless of completion order.
+    """
+    jobs = []
+    for event in events:
+        for source_name, (id_attr, _) in SOURCE_FETCHERS.items():
+            external_id = getattr(event, id_attr)
+            if external_id and source_name in source_map:
+                jobs.append((event.id, source_name, str(external_id)))
+    return jobs
+
+async def fetch_all(
+    jobs: List[Tuple[int, str, str]],
+    deadline: float = INGEST_CYCLE_DEADLINE,
+    on_progress: Optional[Callable[[List[Optional[float]], List[bool]], None]] = None
+) -> Tuple[List[Optional[float]], List[bool]]:
+    """
+    Fan out all fetch jobs concurrently, bounded per source by a semaphore.
+
+    Sources with a batch fetcher get a single task covering all their ids.
+
+    Returns (probabilities, finished): one probability (or None) and one
+    flag per job, in the same order as `jobs`. Jobs that have not finished
+    when the cycle deadline expires are cancelled, reported as None and
+    flagged unfinished; a fetch that failed still counts as finished.
+    `on_progress(probabilities, finished)` is called whenever more jobs have
+    finished, so the caller can write them while the rest are still in flight.
+    """
+    semaphores = {
+        name: asyncio.Semaphore(SOURCE_CONCURRENCY.get(name, INGEST_DEFAULT_CONCURRENCY))
+        for name in SOURCE_FETCHERS
+    }
+    results: List[Optional[float]] = [None] * len(jobs)
+    finished = [False] * len(jobs)
+
+    async def run(index: int, source_name: str, external_id: str):
+        _, fetcher = SOURCE_FETCHERS[source_name]
+        async with semaphores[source_name]:
+            try:
+                results[index] = await fetcher(external_id)
+            except Exception as e:
+                print(f"Error fetching {source_name} for {external_id}: {e}")
+        finished[index] = True
+
+    async def run_batch(source_name: str, indexes: List[int]):
+        ids = [jobs[i][2] for i in indexes]
+        try:
+            probabilities = await BATCH_FETCHERS[source_name](ids)
+        except Exception as e:
+            print(f"Error batch fetching {source_name}: {e}")
+            probabilities = {}
+        for i in indexes:
+            results[i] = probabilities.get(jobs[i][2])
+            finished[i] = True
+
+    batched: Dict[str, List[int]] = {}
+    tasks = []
+    for i, (_, source_name, external_id) in enumerate(jobs):
+        if source_name in BATCH_FETCHERS:
+            batched.setdefault(source_name, []).append(i)
+        else:
+            tasks.append(asyncio.create_task(run(i, source_name, external_id)))
+    for source_name, indexes in batched.items():
+        tasks.append(asyncio.create_task(run_batch(source_name, indexes)))
+
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = expires - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if done and on_progress is not None:
+                on_progress(results, finished)
+    finally:
+        if pending:
+            print(f"Ingestion deadline of {deadline:g}s reached, cancelling {len(pending)} pending fetches")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    return results, finished
+
+async def ingest_forecasts(pairs: Optional[Set[Tuple[int, str]]] = None) -> Dict[Tuple[int, str], Optional[float]]:
     """
     Main ingestion function that fetches forecasts from all sources
     and stores them in the database.
+
+    With `pairs`, only those (event_id, source_name) combinations are fetched
+    (the adaptive scheduler polls each on its own timetable). Returns the
+    fetched probability, or None, per (event_id, source_name).
+
+    Only one cycle runs at a time across processes; if another holds the
+    lock, this one is skipped. See _ingest() for chunking and checkpoints.
+    """
+    with cycle_lock() as acquired:
+        if not acquired:
+            print("Another ingestion cycle is still running, skipping this one")
+            return {}
+        return await _ingest(pairs)
+
+async def _ingest(pairs: Optional[Set[Tuple[int, str]]]) -> Dict[Tuple[int, str], Optional[float]]:
+    """
+    Fetch every event concurrently and write them in id order as their
+    fetches finish, INGEST_COMMIT_EVERY events per transaction. A full cycle
+    records its progress in the ingestion checkpoint in the same transaction
+    as each batch, so after a crash, or when the cycle deadline cuts it
+    short, the next cycle resumes with the following events.
     """
     db = SessionLocal()
-    
+    cycle_started = datetime.utcnow()
+
     try:
         # Get all active events
-        events = db.query(Event).filter(Event.resolved == False).all()
-        
+        query = db.query(Event).filter(Event.resolved == False)
+        if pairs is not None:
+            query = query.filter(Event.id.in_({event_id for event_id, _ in pairs}))
+
+        checkpoint = None
+        if pairs is None:
+            checkpoint = start_cycle(db)
+            done = resume_after(checkpoint)
+            if done:
+                print(f"Resuming the ingestion cycle started at {checkpoint.started_at} after event {done}")
+                query = query.filter(Event.id > done)
+        events = query.order_by(Event.id).all()
+
         # Get all active sources
         sources = db.query(Source).filter(Source.is_active == True).all()
-        
+
         source_map = {source.name: source for source in sources}
-        
-        for event in events:
-            # Fetch from Polymarket
-            if event.polymarket_id and "polymarket" in source_map:
-                prob = await polymarket.fetch_polymarket_probability(event.polymarket_id)
-                if prob is not None:
-                    save_forecast(db, event.id, source_map["polymarket"].id, prob, "polymarket")
-            
-            # Fetch from Kalshi
-            if event.kalshi_id and "kalshi" in source_map:
-                prob = await kalshi.fetch_kalshi_probability(event.kalshi_id)
-                if prob is not None:
-                    save_forecast(db, event.id, source_map["kalshi"].id, prob, "kalshi")
-            
-            # Fetch from Metaculus
-            if event.metaculus_id and "metaculus" in source_map:
-                prob = await metaculus.fetch_metaculus_probability(int(event.metaculus_id))
-                if prob is not None:
-                    save_forecast(db, event.id, source_map["metaculus"].id, prob, "metaculus")
-            
-            # Fetch from public model
-            if event.public_model_id and "public_model" in source_map:
-                prob = await public_model.fetch_public_model_probability(event.public_model_id)
-                if prob is not None:
-                    save_forecast(db, event.id, source_map["public_model"].id, prob, "public_model")
-            
-            # Update consensus after ingesting all sources
-            update_consensus(db, event.id)
-        
-        db.commit()
+        source_names = {source.id: source.display_name for source in sources}
+
+        jobs = build_fetch_jobs(events, source_map)
+        if pairs is not None:
+            jobs = [job for job in jobs if (job[0], job[1]) in pairs]
+
+        # Keep the Polymarket market snapshot current (at most one refresh per
+        # TTL or incremental interval) so per-event lookups are local
+        if any(source_name == "polymarket" for _, source_name, _ in jobs):
+            await polymarket.ensure_market_catalog()
+
+        # One fan-out for the whole cycle; events are written and committed in
+        # id order as soon as every fetch for them (and for all earlier events)
+        # has finished, INGEST_COMMIT_EVERY at a time
+        event_jobs: Dict[int, List[int]] = {event.id: [] for event in events}
+        for index, (event_id, _, _) in enumerate(jobs):
+            event_jobs[event_id].append(index)
+        written = 0  # events[:written] are committed
+        ready = 0  # events[:ready] have all their fetches finished
+
+        def commit_ready(probabilities: List[Optional[float]], finished: List[bool], final: bool = False):
+            nonlocal written, ready
+            while ready < len(events) and all(finished[j] for j in event_jobs[events[ready].id]):
+                ready += 1
+            while ready - written >= INGEST_COMMIT_EVERY or (final and ready > written):
+                batch = events[written:min(written + INGEST_COMMIT_EVERY, ready)]
+                batch_jobs = [j for event in batch for j in event_jobs[event.id]]
+                stored, new_rows, consensus = _write_chunk(
+                    db, [jobs[j] for j in batch_jobs], [probabilities[j] for j in batch_jobs], source_map
+                )
+                if checkpoint is not None:
+                    advance_cycle(checkpoint, batch[-1].id, len(batch))
+                db.commit()
+                written += len(batch)
+                if stored or consensus:
+                    # New rows change cached series and rollups: invalidate cached API responses in every web process
+                    bump_version()
+                if new_rows or consensus:
+                    # Push the batch's moved points and consensus to /api/stream clients
+                    publish_cycle(new_rows, consensus, source_names)
+
+        remaining = INGEST_CYCLE_DEADLINE - (datetime.utcnow() - cycle_started).total_seconds()
+        started = datetime.utcnow()
+        probabilities, finished = await fetch_all(jobs, deadline=max(remaining, 0), on_progress=commit_ready)
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(f"Fetched {sum(finished)} of {len(jobs)} forecasts for {len(events)} events in {elapsed:.1f}s")
+        commit_ready(probabilities, finished, final=True)
+
+        if written == len(events):
+            if checkpoint is not None:
+                complete_cycle(checkpoint)
+                db.commit()
+        else:
+            # Fetches past the first unfinished event are dropped, not written,
+            # so the resumed cycle doesn't store them twice
+            print(f"Ingestion deadline of {INGEST_CYCLE_DEADLINE:g}s reached; "
+                  f"{len(events) - written} events left for the next cycle")
+
+        results: Dict[Tuple[int, str], Optional[float]] = {
+            (event_id, source_name): probabilities[j]
+            for j, (event_id, source_name, _) in enumerate(jobs) if finished[j]
+        }
+
+        print(f"HTTP pool stats: {get_pool_stats()}")
+        print(f"Conditional fetch stats: {get_fetch_stats()}")
         print(f"Ingestion completed at {datetime.utcnow()}")
-        
+        return results
+
     except Exception as e:
         db.rollback()
         print(f"Error in ingestion: {e}")
@@ -60,18 +260,63 @@ async def ingest_forecasts():
     finally:
         db.close()
 
-def save_forecast(db: Session, event_id: int, source_id: int, probability: float, source_name: str):
-    """Save a forecast to the database"""
-    forecast = Forecast(
-        event_id=event_id,
-        source_id=source_id,
-        probability=probability,
-        timestamp=datetime.utcnow()
-    )
-    db.add(forecast)
+def _write_chunk(
+    db: Session,
+    jobs: List[Tuple[int, str, str]],
+    probabilities: List[Optional[float]],
+    source_map: Dict[str, Source]
+) -> Tuple[int, List[Dict], Dict[int, Dict]]:
+    """
+    Write one batch's forecasts and recompute its changed events' consensus.
+    Does not commit. Returns (rows stored, changed forecast rows, consensus
+    by event); rows stored only to extend history with an unchanged value
+    are counted but not listed as changed.
+    """
+    # Buffer the batch's forecasts and write them in one bulk insert
+    writer = ForecastWriter(db)
+    same_payload = set()
+    for (event_id, source_name, _), prob in zip(jobs, probabilities):
+        if prob is not None:
+            save_forecast(writer, event_id, source_map[source_name].id, prob, source_name)
+            if isinstance(prob, Unchanged):
+                same_payload.add((event_id, source_map[source_name].id))
+
+    # Compare against latest_forecasts before the flush overwrites it
+    changed = find_changed_forecasts(db, writer.rows, INGEST_CHANGE_EPSILON)
+    print(f"{len(changed)} of {len(writer)} forecasts changed")
+    if INGEST_SKIP_UNCHANGED:
+        writer.rows = [row for row in writer.rows if (row["event_id"], row["source_id"]) in changed]
+    elif same_payload:
+        # The source answered with the same payload as last time (a 304 or an
+        # identical body): nothing new to store unless it never got stored
+        skip = same_payload - changed
+        writer.rows = [row for row in writer.rows if (row["event_id"], row["source_id"]) not in skip]
+        print(f"Skipped {len(skip)} forecasts whose source payload was unchanged")
+    new_rows = [row for row in writer.rows if (row["event_id"], row["source_id"]) in changed]
+    started = datetime.utcnow()
+    written = writer.flush()
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    print(f"Wrote {written} forecasts in {elapsed * 1000:.1f}ms")
+
+    # Recompute consensus, in one read and one upsert, only for events
+    # where at least one source moved; the others keep their stored values
+    changed_events = sorted({event_id for event_id, _ in changed})
+    consensus = update_all_consensus(db, changed_events) if changed_events else {}
+    print(f"Recomputed consensus for {len(consensus)} events")
+    return written, new_rows, consensus
+
+def save_forecast(writer: ForecastWriter, event_id: int, source_id: int, probability: float, source_name: str):
+    """Buffer a forecast for the cycle's bulk write"""
+    writer.add(event_id, source_id, float(probability), timestamp=datetime.utcnow())
     print(f"Saved forecast: {source_name} -> {probability:.2%} for event {event_id}")
 
+async def run_once():
+    """Run a single ingestion cycle and release pooled HTTP connections"""
+    try:
+        await ingest_forecasts()
+    finally:
+        await close_clients()
+
 if __name__ == "__main__":
     # Run ingestion
-    asyncio.run(ingest_forecasts())
-
+    asyncio.run(run_once())
@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
 from app.models import Event, Source, Forecast
+from app.services.forecast_writer import ForecastWriter
+from app.services.cache import bump_version
 from datetime import datetime, timedelta
 import random
 
@@ -28,6 +30,9 @@ try:
     
     print(f"Adding sample forecast data for {len(events)} events...")
     
+    # Buffer every row and write them in one bulk insert at the end
+    writer = ForecastWriter(db)
+    
     for event in events:
         print(f"\nProcessing event: {event.title}")
         
@@ -58,21 +63,21 @@ try:
                 
                 probability = max(0.05, min(0.95, source_base + trend + noise))
                 
-                # Create forecast record
-                forecast = Forecast(
+                # Buffer forecast record
+                writer.add(
                     event_id=event.id,
                     source_id=source.id,
                     probability=round(probability, 4),
                     timestamp=timestamp,
                     raw_data=None
                 )
-                db.add(forecast)
         
         print(f"  Added forecast data from {len(sources)} sources")
         print(f"  Generated {28} time points per source ({28 * len(sources)} total forecasts)")
     
+    written = writer.flush()
     db.commit()
-    print("\n✅ Sample forecast data added successfully!")
+    print(f"\n✅ Sample forecast data added successfully! ({written} rows)")
     print("\nNote: This is sample data for demonstration. For real data, run:")
     print("  python scripts/scheduler.py")
     print("  or")
@@ -86,4 +91,5 @@ except Exception as e:
     raise
 finally:
     db.close()
+    bump_version()
 
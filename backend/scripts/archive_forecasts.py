@@ -0,0 +1,35 @@
+"""
+Apply the forecast retention policy: move raw forecasts older than the
+retention window to date-partitioned Parquet files and delete them from the
+database. Hourly/daily rollups for the archived days stay in SQL.
+
+Usage: python scripts/archive_forecasts.py [retention_days]
+    retention_days  defaults to FORECAST_RETENTION_DAYS
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.archival import FORECAST_ARCHIVE_DIR, archive_forecasts
+
+def main(retention_days=None):
+    db = SessionLocal()
+    try:
+        summary = archive_forecasts(db, retention_days)
+        if summary["cutoff"] is None:
+            print("Archival disabled (retention_days <= 0)")
+            return
+        print(
+            f"Archived {summary['rows']} forecasts from {summary['days']} days "
+            f"older than {summary['cutoff']} to {FORECAST_ARCHIVE_DIR}"
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving forecasts: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
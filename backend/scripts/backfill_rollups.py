@@ -0,0 +1,35 @@
+"""
+Rebuild the hourly and daily forecast rollups from raw forecast history.
+Safe to re-run: buckets in the covered range are deleted and recomputed.
+Buckets of days already archived to Parquet are never touched.
+
+Usage: python scripts/backfill_rollups.py [days]
+    days  only rebuild the last N days (default: all raw history)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from app.database import SessionLocal, engine, Base, create_indexes
+from app.services.rollups import backfill_rollups
+
+def main(days=None):
+    Base.metadata.create_all(bind=engine)
+    create_indexes()
+    
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    db = SessionLocal()
+    try:
+        total = backfill_rollups(db, since=since)
+        scope = f"the last {days} days" if days else "all raw history"
+        print(f"Rolled up {total} forecasts from {scope}")
+    except Exception as e:
+        db.rollback()
+        print(f"Error backfilling rollups: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,127 @@
+"""
+Benchmark Polymarket calls per ingestion cycle against a local stub server.
+Compares the old per-market flow (market list + one /book request per market)
+with the catalog snapshot and batched order book fetcher.
+
+Usage: python scripts/benchmark_polymarket_books.py [n_markets]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from app.services.ingestion import polymarket
+from app.services.ingestion.http_client import get_client, close_clients
+
+PAGE_SIZE = 100
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal CLOB stand-in: paginated /markets, GET /book and POST /books"""
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _book(self, token_id):
+        return {
+            "asset_id": token_id,
+            "bids": [{"price": "0.48", "size": "100"}],
+            "asks": [{"price": "0.52", "size": "100"}],
+        }
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        self.server.calls[f"GET {url.path}"] += 1
+        if url.path == "/markets":
+            cursor = query.get("next_cursor", [None])[0]
+            offset = int(base64.b64decode(cursor)) if cursor else 0
+            next_offset = offset + PAGE_SIZE
+            next_cursor = (base64.b64encode(str(next_offset).encode()).decode()
+                           if next_offset < len(self.server.markets) else polymarket.END_CURSOR)
+            return self._send({
+                "data": self.server.markets[offset:next_offset],
+                "next_cursor": next_cursor,
+            })
+        if url.path == "/book":
+            return self._send(self._book(query["token_id"][0]))
+        self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        self.server.calls[f"POST {url.path}"] += 1
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"[]")
+        if url.path == "/books" and self.server.batch_enabled:
+            return self._send([self._book(item["token_id"]) for item in body])
+        self._send({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(n_markets: int, batch_enabled: bool):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.markets = [
+        {"condition_id": f"0xcond{i}", "market_slug": f"market-{i}", "question_id": f"0xq{i}"}
+        for i in range(n_markets)
+    ]
+    server.calls = Counter()
+    server.batch_enabled = batch_enabled
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def legacy_cycle(market_ids):
+    """The pre-batching flow: first market page plus one /book request per market"""
+    client = get_client(polymarket.POLYMARKET_API_BASE)
+    for market_id in market_ids:
+        response = await client.get(f"{polymarket.POLYMARKET_API_BASE}/markets?active=true&limit=100")
+        markets = response.json().get("data", [])
+        market = next((m for m in markets if m.get("condition_id") == market_id), None)
+        if market:
+            await client.get(f"{polymarket.POLYMARKET_API_BASE}/book?token_id={market_id}")
+
+async def batched_cycle(market_ids):
+    polymarket.market_catalog = polymarket.MarketCatalog()
+    await polymarket.refresh_market_catalog(full=True)
+    return await polymarket.fetch_polymarket_probabilities(market_ids)
+
+async def run(label, server, cycle, market_ids):
+    polymarket.POLYMARKET_API_BASE = f"http://127.0.0.1:{server.server_port}"
+    server.calls.clear()
+    started = time.perf_counter()
+    result = await cycle(market_ids)
+    elapsed = time.perf_counter() - started
+    total = sum(server.calls.values())
+    priced = sum(1 for p in (result or {}).values() if p is not None) if result else "-"
+    print(f"{label:<28} {total:>6} calls  {elapsed * 1000:>8.1f} ms  priced={priced}  {dict(server.calls)}")
+
+async def main(n_markets: int):
+    market_ids = [f"0xcond{i}" for i in range(n_markets)]
+    print(f"Polymarket calls per cycle for {n_markets} tracked markets\n")
+
+    server = start_stub_server(n_markets, batch_enabled=True)
+    await run("before (per-market)", server, legacy_cycle, market_ids)
+    await run("after (POST /books)", server, batched_cycle, market_ids)
+    await close_clients()
+    server.shutdown()
+
+    server = start_stub_server(n_markets, batch_enabled=False)
+    polymarket._batch_books_supported = True
+    await run("after (GET /book fallback)", server, batched_cycle, market_ids)
+    await close_clients()
+    server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
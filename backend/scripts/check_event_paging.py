@@ -0,0 +1,57 @@
+"""
+Page through GET /api/events the way the frontend does (unresolved events,
+selected fields, following X-Next-Cursor) and check that every unresolved
+event comes back exactly once, across more than one page when there are
+more events than `page_size`.
+
+Usage: python scripts/check_event_paging.py [page_size]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.database import SessionLocal
+from app.main import app
+from app.models import Event
+
+def main(page_size=1):
+    db = SessionLocal()
+    try:
+        expected = [event_id for (event_id,) in db.query(Event.id).filter(Event.resolved == False)]
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    seen = []
+    pages = 0
+    cursor = None
+    # More pages than events means the cursor stopped advancing
+    for _ in range(len(expected) // page_size + 2):
+        # Same request as fetchEvents() in frontend/app/page.tsx
+        params = {"resolved": "false", "fields": "id,title,description,category,resolved", "limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/events", params=params)
+        response.raise_for_status()
+        pages += 1
+        seen.extend(event["id"] for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    else:
+        print(f"Paging did not terminate after {len(seen)} rows")
+        sys.exit(1)
+
+    duplicates = len(seen) - len(set(seen))
+    missing = set(expected) - set(seen)
+    if duplicates or missing:
+        print(f"Paging returned {duplicates} duplicate and missed {len(missing)} of {len(expected)} events")
+        sys.exit(1)
+    if len(expected) > page_size and pages < 2:
+        print(f"Expected more than one page for {len(expected)} events")
+        sys.exit(1)
+    print(f"Paged through all {len(expected)} events in {pages} pages of {page_size}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -9,36 +9,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import asyncio
 import httpx
 from app.database import SessionLocal
-from app.models import Event, Forecast, Source
+from app.services.forecast_writer import ForecastWriter
+from app.services.cache import bump_version
+from app.models import Event, Forecast, ForecastRollup, LatestForecast, Source
 from datetime import datetime, timedelta
 from app.services.consensus_calculator import update_consensus
+from app.services.ingestion import polymarket
+from app.services.ingestion.http_client import close_clients
 import re
 
-async def fetch_live_polymarket_probability(condition_id):
-    """Fetch LIVE probability from Polymarket order book"""
-    try:
-        async with httpx.AsyncClient() as client:
-            book_url = f"https://clob.polymarket.com/book?token_id={condition_id}"
-            resp = await client.get(book_url, timeout=10.0)
-            
-            if resp.status_code == 200:
-                book_data = resp.json()
-                bids = book_data.get('bids', [])
-                asks = book_data.get('asks', [])
-                
-                if bids and asks:
-                    best_bid = float(bids[0][0])
-                    best_ask = float(asks[0][0])
-                    return (best_bid + best_ask) / 2
-                elif bids:
-                    return float(bids[0][0])
-                elif asks:
-                    return float(asks[0][0])
-            
-            return None
-    except Exception as e:
-        print(f"      ⚠ Error fetching order book: {e}")
-        return None
+def has_liquidity(book):
+    """True if an order book has any bids or asks"""
+    return bool(book and (book.get('bids') or book.get('asks')))
 
 def is_current_year_market(market):
     """Check if market is from 2024 or 2025"""
@@ -71,6 +53,7 @@ def is_current_year_market(market):
 async def main():
     """Fetch CURRENT live data from active markets"""
     db = SessionLocal()
+    writer = ForecastWriter(db)
     
     try:
         print("="*70)
@@ -99,44 +82,24 @@ async def main():
             
             # Filter for CURRENT 2024/2025 markets
             print("\n2. Filtering for CURRENT 2024/2025 markets...")
-            current_markets = []
+            candidates = [m for m in markets if is_current_year_market(m) and m.get('condition_id')]
             
-            for market in markets:
-                if is_current_year_market(market):
-                    condition_id = market.get('condition_id')
-                    if condition_id:
-                        # Quick check if order book is accessible
-                        try:
-                            book_url = f"https://clob.polymarket.com/book?token_id={condition_id}"
-                            book_resp = await client.get(book_url, timeout=3.0)
-                            if book_resp.status_code == 200:
-                                book_data = book_resp.json()
-                                if book_data.get('bids') or book_data.get('asks'):
-                                    current_markets.append(market)
-                                    if len(current_markets) >= 20:
-                                        break
-                        except:
-                            continue
+            # Check order books for all candidates in one batched pass
+            books = await polymarket.fetch_order_books([m['condition_id'] for m in candidates])
+            current_markets = [
+                m for m in candidates if has_liquidity(books.get(str(m['condition_id'])))
+            ][:20]
             
             print(f"   ✓ Found {len(current_markets)} CURRENT active markets\n")
             
             if not current_markets:
                 print("   ⚠ No current markets found. Trying broader search...")
                 # Fallback: get any markets with order books
-                for market in markets[:50]:
-                    condition_id = market.get('condition_id')
-                    if condition_id:
-                        try:
-                            book_url = f"https://clob.polymarket.com/book?token_id={condition_id}"
-                            book_resp = await client.get(book_url, timeout=3.0)
-                            if book_resp.status_code == 200:
-                                book_data = book_resp.json()
-                                if book_data.get('bids') or book_data.get('asks'):
-                                    current_markets.append(market)
-                                    if len(current_markets) >= 15:
-                                        break
-                        except:
-                            continue
+                candidates = [m for m in markets[:50] if m.get('condition_id')]
+                books = await polymarket.fetch_order_books([m['condition_id'] for m in candidates])
+                current_markets = [
+                    m for m in candidates if has_liquidity(books.get(str(m['condition_id'])))
+                ][:15]
             
             if not current_markets:
                 print("   ❌ Could not find markets with accessible order books")
@@ -148,6 +111,8 @@ async def main():
             for e in old_events:
                 # Delete forecasts first
                 db.query(Forecast).filter(Forecast.event_id == e.id).delete()
+                db.query(LatestForecast).filter(LatestForecast.event_id == e.id).delete()
+                db.query(ForecastRollup).filter(ForecastRollup.event_id == e.id).delete()
                 db.delete(e)
             db.commit()
             
@@ -192,12 +157,18 @@ async def main():
             
             total_forecasts = 0
             
+            # Fetch current probabilities for every market in one batched pass
+            mids = await polymarket.fetch_order_book_mids(
+                [market.get('condition_id') for _, market in events],
+                allow_one_sided=True
+            )
+            
             for i, (event, market) in enumerate(events):
                 condition_id = market.get('condition_id')
                 print(f"\n   📊 {i+1}. {event.title[:55]}")
                 
-                # Fetch current probability
-                prob = await fetch_live_polymarket_probability(condition_id)
+                # Current probability from the batched order books
+                prob = mids.get(str(condition_id))
                 
                 if prob is None:
                     # Try market's outcomes field as fallback
@@ -213,13 +184,12 @@ async def main():
                         prob = 0.3 + (i * 0.03) % 0.5
                 
                 # Save current forecast
-                forecast = Forecast(
+                writer.add(
                     event_id=event.id,
                     source_id=source.id,
                     probability=round(prob, 4),
                     timestamp=datetime.utcnow()
                 )
-                db.add(forecast)
                 total_forecasts += 1
                 
                 # Save historical points for time series (with variation)
@@ -228,18 +198,18 @@ async def main():
                     variation = (j * 0.005 - 0.015) + (i * 0.002) % 0.01
                     hist_prob = max(0.05, min(0.95, prob + variation))
                     
-                    hist_forecast = Forecast(
+                    writer.add(
                         event_id=event.id,
                         source_id=source.id,
                         probability=round(hist_prob, 4),
                         timestamp=datetime.utcnow() - timedelta(hours=j*6)
                     )
-                    db.add(hist_forecast)
                     total_forecasts += 1
                 
                 print(f"      ✓ LIVE Probability: {prob:.2%} (+ 5 historical points)")
                 
                 # Update consensus
+                writer.flush()
                 update_consensus(db, event.id)
             
             db.commit()
@@ -266,6 +236,8 @@ async def main():
         raise
     finally:
         db.close()
+        bump_version()
+        await close_clients()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -9,49 +9,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import asyncio
 import httpx
 from app.database import SessionLocal
-from app.models import Event, Forecast, Source
+from app.services.forecast_writer import ForecastWriter
+from app.services.cache import bump_version
+from app.models import Event, ForecastRollup, LatestForecast, Source
 from datetime import datetime, timedelta
 from app.services.consensus_calculator import update_consensus
+from app.services.ingestion import polymarket
+from app.services.ingestion.http_client import close_clients
 import random
 
-async def fetch_live_polymarket_data(market, source_id):
-    """Fetch live probability from a Polymarket market"""
-    try:
-        condition_id = market.get('condition_id')
-        if not condition_id:
-            return None
-        
-        async with httpx.AsyncClient() as client:
-            # Get order book to calculate probability
-            book_url = f"https://clob.polymarket.com/book?token_id={condition_id}"
-            resp = await client.get(book_url, timeout=10.0)
-            
-            if resp.status_code == 200:
-                book_data = resp.json()
-                
-                # Calculate from order book
-                bids = book_data.get('bids', [])
-                asks = book_data.get('asks', [])
-                
-                if bids and asks:
-                    best_bid = float(bids[0][0])
-                    best_ask = float(asks[0][0])
-                    probability = (best_bid + best_ask) / 2
-                    return probability
-                elif bids:
-                    # Only bids available
-                    probability = float(bids[0][0])
-                    return probability
-                elif asks:
-                    # Only asks available
-                    probability = float(asks[0][0])
-                    return probability
-                
-        return None
-    except Exception as e:
-        print(f"    Error fetching Polymarket data: {e}")
-        return None
-
 async def fetch_live_metaculus_data(question_id):
     """Fetch live probability from Metaculus"""
     try:
@@ -85,6 +51,7 @@ async def fetch_live_metaculus_data(question_id):
 async def main():
     """Main function to fetch live data from multiple markets"""
     db = SessionLocal()
+    writer = ForecastWriter(db)
     
     try:
         print("="*70)
@@ -127,6 +94,8 @@ async def main():
         # Delete old events
         old_events = db.query(Event).filter(Event.resolved == False).all()
         for e in old_events:
+            db.query(LatestForecast).filter(LatestForecast.event_id == e.id).delete()
+            db.query(ForecastRollup).filter(ForecastRollup.event_id == e.id).delete()
             db.delete(e)
         db.commit()
         
@@ -156,6 +125,14 @@ async def main():
         
         total_forecasts = 0
         
+        # Fetch every market's order book in one batched pass
+        polymarket_mids = {}
+        if "polymarket" in source_map:
+            polymarket_mids = await polymarket.fetch_order_book_mids(
+                [market.get('condition_id') for _, market in events],
+                allow_one_sided=True
+            )
+        
         for event, market in events:
             print(f"\n📊 Event: {event.title[:60]}")
             forecasts_saved = 0
@@ -163,32 +140,30 @@ async def main():
             # Fetch from Polymarket
             if event.polymarket_id and "polymarket" in source_map:
                 print(f"   → Polymarket (ID: {event.polymarket_id[:20]}...)")
-                prob = await fetch_live_polymarket_data(market, source_map["polymarket"].id)
+                prob = polymarket_mids.get(str(market.get('condition_id')))
                 
                 # If no probability from API, use varied probabilities per market
                 if prob is None:
                     prob = 0.3 + (event.id * 0.04) % 0.5  # Different for each event
                 
                 # Save current forecast
-                forecast = Forecast(
+                writer.add(
                     event_id=event.id,
                     source_id=source_map["polymarket"].id,
                     probability=round(prob, 4),
                     timestamp=datetime.utcnow()
                 )
-                db.add(forecast)
                 forecasts_saved += 1
                 
                 # Save historical points for time series
                 for j in range(1, 6):
                     hist_prob = prob + (j * 0.01 - 0.03)
-                    hist_forecast = Forecast(
+                    writer.add(
                         event_id=event.id,
                         source_id=source_map["polymarket"].id,
                         probability=round(max(0.05, min(0.95, hist_prob)), 4),
                         timestamp=datetime.utcnow() - timedelta(hours=j*6)
                     )
-                    db.add(hist_forecast)
                 
                 print(f"      ✓ Probability: {prob:.2%} (+ 5 historical points)")
             
@@ -198,13 +173,12 @@ async def main():
                 prob = await fetch_live_metaculus_data(int(event.metaculus_id))
                 
                 if prob is not None:
-                    forecast = Forecast(
+                    writer.add(
                         event_id=event.id,
                         source_id=source_map["metaculus"].id,
                         probability=round(prob, 4),
                         timestamp=datetime.utcnow()
                     )
-                    db.add(forecast)
                     forecasts_saved += 1
                     print(f"      ✓ Probability: {prob:.2%}")
                 else:
@@ -213,6 +187,7 @@ async def main():
             # Update consensus
             if forecasts_saved > 0:
                 try:
+                    writer.flush()
                     update_consensus(db, event.id)
                     consensus = db.query(Event).filter(Event.id == event.id).first()
                     print(f"      ✓ Consensus updated")
@@ -248,6 +223,8 @@ async def main():
         raise
     finally:
         db.close()
+        bump_version()
+        await close_clients()
 
 if __name__ == "__main__":
     asyncio.run(main())
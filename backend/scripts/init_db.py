@@ -6,12 +6,19 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal, engine, Base
-from app.models import Source, Event
+from app.database import SessionLocal, engine, Base, create_indexes
+from app.services.partitioning import ensure_forecast_partitions
+from app.models import Source, Event, ForecastRollup
+from app.services.forecast_writer import rebuild_latest_forecasts
+from app.services.rollups import backfill_rollups
 from datetime import datetime, timedelta
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+partitioning = ensure_forecast_partitions(engine)
+if partitioning:
+    print(partitioning)
+create_indexes()
 
 db = SessionLocal()
 
@@ -89,6 +96,18 @@ try:
             print(f"Event already exists: {event.title}")
     
     db.commit()
+    
+    # Backfill the current-probability table from existing forecast history
+    rebuilt = rebuild_latest_forecasts(db)
+    db.commit()
+    print(f"Rebuilt latest_forecasts ({rebuilt} rows)")
+    
+    # Roll the same history up into hourly/daily aggregates, once; ingestion
+    # keeps them current and scripts/backfill_rollups.py rebuilds on demand
+    if db.query(ForecastRollup).first() is None:
+        rolled_up = backfill_rollups(db)
+        print(f"Built forecast_rollups from {rolled_up} forecasts")
+    
     print("\nDatabase initialized successfully!")
     print("\nNote: Update the sample events with actual market IDs from your sources.")
     
@@ -0,0 +1,39 @@
+"""
+Migrate the forecasts table to native PostgreSQL range partitioning by month
+on `timestamp`. Existing rows are copied into monthly partitions in a single
+transaction, so stop the ingestion scheduler while it runs.
+
+Usage: python scripts/partition_forecasts.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from app.database import engine
+from app.services.partitioning import (
+    ensure_future_partitions,
+    is_postgresql,
+    list_partitions,
+    migrate_forecasts_to_partitioned,
+)
+
+def main():
+    if not is_postgresql(engine):
+        print("Partitioning requires PostgreSQL; nothing to do.")
+        return
+    
+    started = time.perf_counter()
+    moved = migrate_forecasts_to_partitioned(engine)
+    if moved < 0:
+        print("forecasts is already partitioned.")
+    else:
+        print(f"Moved {moved} forecasts into the partitioned table in {time.perf_counter() - started:.1f}s")
+    
+    ensure_future_partitions(engine)
+    with engine.connect() as connection:
+        partitions = list_partitions(connection)
+    print(f"{len(partitions)} partitions: {', '.join(partitions)}")
+
+if __name__ == "__main__":
+    main()
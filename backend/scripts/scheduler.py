@@ -3,24 +3,75 @@ Scheduler script to run ingestion worker periodically.
 Run this as a background process or cron job.
 """
 import asyncio
+import os
 import time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.workers.ingestion_worker import ingest_forecasts
+from app.workers.adaptive_scheduler import AdaptiveScheduler
+from app.database import SessionLocal, engine
+from app.services.archival import FORECAST_RETENTION_DAYS, PYARROW_AVAILABLE, archive_forecasts
+from app.services.ingestion.http_client import close_clients
+from app.services.partitioning import ensure_future_partitions
+
+# "adaptive" polls each (event, source) on its own timetable; "fixed" re-ingests everything every 15 minutes
+INGEST_SCHEDULER = os.getenv("INGEST_SCHEDULER", "adaptive")
+
+def run_archival():
+    """Move raw forecasts past the retention window to Parquet"""
+    db = SessionLocal()
+    try:
+        summary = archive_forecasts(db)
+        print(f"Archived {summary['rows']} forecasts from {summary['days']} days")
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving forecasts: {e}")
+    finally:
+        db.close()
 
 async def main():
     scheduler = AsyncIOScheduler()
+    poller = None
     
-    # Run ingestion every 15 minutes
+    if INGEST_SCHEDULER == "fixed":
+        # Run ingestion every 15 minutes
+        scheduler.add_job(
+            ingest_forecasts,
+            'interval',
+            minutes=15,
+            id='ingestion_job',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+    else:
+        # Volatile and soon-to-resolve markets are polled more often than dormant ones
+        poller = asyncio.create_task(AdaptiveScheduler().run())
+    
+    # Keep forecast partitions created a few months ahead (no-op unless partitioned)
     scheduler.add_job(
-        ingest_forecasts,
-        'interval',
-        minutes=15,
-        id='ingestion_job',
+        ensure_future_partitions,
+        'cron',
+        hour=2,
+        args=[engine],
+        id='partitions_job',
         replace_existing=True
     )
     
+    # Apply the retention policy once a day, off the event loop
+    if FORECAST_RETENTION_DAYS > 0 and PYARROW_AVAILABLE:
+        scheduler.add_job(
+            run_archival,
+            'cron',
+            hour=3,
+            id='archival_job',
+            replace_existing=True
+        )
+    
     scheduler.start()
-    print("Scheduler started. Ingestion will run every 15 minutes.")
+    if poller is None:
+        print("Scheduler started. Ingestion will run every 15 minutes.")
+    else:
+        print("Scheduler started. Ingestion polls each event adaptively.")
     
     try:
         # Keep the script running
@@ -29,6 +80,10 @@ async def main():
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
         print("Scheduler stopped.")
+    finally:
+        if poller is not None:
+            poller.cancel()
+        await close_clients()
 
 if __name__ == "__main__":
     asyncio.run(main())
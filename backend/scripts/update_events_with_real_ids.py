@@ -9,7 +9,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import asyncio
 import httpx
 from app.database import SessionLocal
-from app.models import Event, Source, Forecast
+from app.services.forecast_writer import ForecastWriter
+from app.services.cache import bump_version
+from app.models import Event, Source
 from datetime import datetime
 from app.services.ingestion import polymarket, metaculus, public_model
 from app.services.consensus_calculator import update_consensus
@@ -17,6 +19,7 @@ from app.services.consensus_calculator import update_consensus
 async def find_and_update_real_markets():
     """Find real markets and update events"""
     db = SessionLocal()
+    writer = ForecastWriter(db)
     
     try:
         print("Searching for real markets from APIs...\n")
@@ -91,13 +94,12 @@ async def find_and_update_real_markets():
                 try:
                     prob = await polymarket.fetch_polymarket_probability(event.polymarket_id)
                     if prob is not None:
-                        forecast = Forecast(
+                        writer.add(
                             event_id=event.id,
                             source_id=source_map["polymarket"].id,
                             probability=prob,
                             timestamp=datetime.utcnow()
                         )
-                        db.add(forecast)
                         print(f"    ✓ Polymarket: {prob:.2%}")
                     else:
                         print(f"    ✗ Could not fetch Polymarket data")
@@ -110,13 +112,12 @@ async def find_and_update_real_markets():
                 try:
                     prob = await metaculus.fetch_metaculus_probability(int(event.metaculus_id))
                     if prob is not None:
-                        forecast = Forecast(
+                        writer.add(
                             event_id=event.id,
                             source_id=source_map["metaculus"].id,
                             probability=prob,
                             timestamp=datetime.utcnow()
                         )
-                        db.add(forecast)
                         print(f"    ✓ Metaculus: {prob:.2%}")
                     else:
                         print(f"    ✗ Could not fetch Metaculus data")
@@ -125,6 +126,7 @@ async def find_and_update_real_markets():
             
             # Update consensus
             try:
+                writer.flush()
                 update_consensus(db, event.id)
                 print(f"  ✓ Consensus calculated")
             except Exception as e:
@@ -143,6 +145,7 @@ async def find_and_update_real_markets():
         raise
     finally:
         db.close()
+        bump_version()
 
 if __name__ == "__main__":
     asyncio.run(find_and_update_real_markets())
@@ -49,12 +49,36 @@ export default function Home() {
     }
   }, [selectedEvent])
 
+  // Live updates pushed after each ingestion cycle, instead of re-fetching
+  useEffect(() => {
+    if (!selectedEvent) return
+    const stream = new EventSource(`${API_BASE}/api/stream?event_ids=${selectedEvent.id}`)
+    stream.addEventListener('consensus', (message) => {
+      const update = JSON.parse((message as MessageEvent).data)
+      setConsensus((current) => ({ ...(current ?? {}), ...update }) as Consensus)
+    })
+    stream.addEventListener('forecasts', (message) => {
+      const update = JSON.parse((message as MessageEvent).data)
+      setForecasts((current) => [...current, ...update.points])
+    })
+    return () => stream.close()
+  }, [selectedEvent])
+
   const fetchEvents = async () => {
     try {
-      const response = await axios.get(`${API_BASE}/api/events?resolved=false`)
-      setEvents(response.data)
-      if (response.data.length > 0 && !selectedEvent) {
-        setSelectedEvent(response.data[0])
+      // The listing is paged; follow X-Next-Cursor until the last page
+      const all: Event[] = []
+      let cursor: string | undefined
+      do {
+        const response = await axios.get(`${API_BASE}/api/events`, {
+          params: { resolved: false, fields: 'id,title,description,category,resolved', limit: 1000, cursor },
+        })
+        all.push(...response.data)
+        cursor = response.headers['x-next-cursor']
+      } while (cursor)
+      setEvents(all)
+      if (all.length > 0 && !selectedEvent) {
+        setSelectedEvent(all[0])
       }
       setLoading(false)
     } catch (error) {
@@ -65,7 +89,7 @@ export default function Home() {
 
   const fetchForecasts = async (eventId: number) => {
     try {
-      const response = await axios.get(`${API_BASE}/api/events/${eventId}/forecasts?hours=168`) // Last week
+      const response = await axios.get(`${API_BASE}/api/events/${eventId}/forecasts?hours=168&max_points=400`) // Last week, bucketed to the chart width
       setForecasts(response.data.forecasts)
     } catch (error) {
       console.error('Error fetching forecasts:', error)